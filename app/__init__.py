@@ -1,18 +1,24 @@
+import gc
 import os
-from datetime import datetime, timedelta, time
 
-import pytz
-from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
 def seed_initial_data():
-    """Seeds the database with genres, movies, and initial showtimes."""
-    from app.models import db, Movie, Showtime, Genre
+    """Seeds the database with genres, movies, and initial showtimes.
+
+    Uses the bulk helpers in ``app.seeding``: genres, movies, genre links and
+    showtimes are each written with one multi-row insert.
+    """
+    from datetime import datetime, timedelta, time
+
+    from app.models import db, Movie, Showtime
+    from app.sample_data.genres import SAMPLE_GENRES
     from app.sample_data.movies import SAMPLE_MOVIES
+    from app.seeding import insert_genres, insert_movies, insert_rows
+    from app.timezones import to_local_naive, to_utc_naive
 
     if Movie.query.count() != 0:
         print("Database already contains data. Seeding skipped.")
@@ -20,43 +26,17 @@ def seed_initial_data():
 
     print("Database is empty, seeding initial data...")
 
-    GENRE_MAP: dict[int, str] = {
-        12: "Adventure",
-        14: "Fantasy",
-        16: "Animation",
-        18: "Drama",
-        28: "Action",
-        35: "Comedy",
-        53: "Thriller",
-        80: "Crime",
-        878: "Science Fiction",
-        9648: "Mystery",
-        99: "Documentary",
-        10749: "Romance",
-        10751: "Family",
-        10752: "War",
-    }
-
-    for genre_id, genre_name in GENRE_MAP.items():
-        if not Genre.query.filter_by(id=genre_id).first():
-            db.session.add(Genre(id=genre_id, name=genre_name))
-    db.session.flush()
-
-    jakarta_tz = pytz.timezone('Asia/Jakarta')
+    insert_genres(SAMPLE_GENRES)
 
     def first_show_datetime() -> datetime:
-        now = datetime.now(jakarta_tz)
+        now = to_local_naive(datetime.utcnow())
 
         candidate = datetime.combine(now.date(), time(hour=6))
-        candidate = jakarta_tz.localize(candidate)
-
         if candidate <= now:
-            candidate = jakarta_tz.localize(
-                datetime.combine(now.date() + timedelta(days=1), time(hour=6))
-            )
+            candidate = datetime.combine(now.date() + timedelta(days=1), time(hour=6))
 
-        # Return naive Jakarta-local datetime for downstream calculations.
-        return candidate.replace(tzinfo=None)
+        # Naive Jakarta-local datetime for downstream calculations.
+        return candidate
 
     def generate_showtimes(studio_number: int) -> list[datetime]:
         start = first_show_datetime()
@@ -64,54 +44,131 @@ def seed_initial_data():
         interval_hours = 3 if studio_number % 2 == 0 else 4
         return [start + timedelta(hours=interval_hours * i) for i in range(slots)]
 
-    def to_utc_naive(local_dt: datetime) -> datetime:
-        """Convert a Jakarta-local naive datetime to naive UTC for storage."""
-        local_aware = jakarta_tz.localize(local_dt)
-        return local_aware.astimezone(pytz.UTC).replace(tzinfo=None)
-
-    for movie_data in SAMPLE_MOVIES:
-        genre_ids = movie_data.get("genre_ids", [])
-        movie_payload = {
-            key: value
-            for key, value in movie_data.items()
-            if key not in {"genre_ids", "genres"}
-        }
-
-        movie = Movie(**movie_payload)
-        db.session.add(movie)
-        db.session.flush()
+    movie_ids = insert_movies(SAMPLE_MOVIES)
 
-        if genre_ids:
-            genres = Genre.query.filter(Genre.id.in_(genre_ids)).all()
-            movie.genres.extend(genres)
-
-        for start_time_local in generate_showtimes(movie.studio_number):
-            show_time_utc = to_utc_naive(start_time_local)
-            db.session.add(Showtime(movie_id=movie.id, time=show_time_utc))
+    insert_rows(Showtime, [
+        {'movie_id': movie_id, 'time': to_utc_naive(start_time_local)}
+        for studio_number, movie_id in movie_ids.items()
+        for start_time_local in generate_showtimes(studio_number)
+    ])
 
     db.session.commit()
     print("Seeding complete.")
 
 # --- FUNGSI CREATE_APP TETAP SAMA ---
 def create_app(config=None):
-    """Application factory pattern for Flask app creation"""
+    """Application factory pattern for Flask app creation.
+
+    Does no schema work: tables are created by `flask init-db`, and boot only
+    checks the stamped schema version (set ``SCHEMA_CHECK=false`` to skip it).
+    Flask and the models are imported here rather than at package import, so
+    importing helpers such as ``app.layouts`` stays cheap.
+
+    Nearly everything allocated while building the app lives as long as the
+    process, so the cyclic GC is paused meanwhile and what was built is then
+    frozen: boot runs no collections, and later ones (and forked workers)
+    skip those objects.
+    """
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _build_app(config)
+    finally:
+        if gc_enabled:
+            gc.freeze()
+            gc.enable()
+
+
+def _build_app(config):
+    from flask import Flask
+
     app = Flask(__name__, template_folder='../templates')
     
     # Configuration
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL') or 'sqlite:///tiketa.db'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Seconds a cached seat bitmap is trusted before it is reloaded
+    app.config['SEAT_AVAILABILITY_TTL'] = float(os.environ.get('SEAT_AVAILABILITY_TTL') or 5)
+    # Seat holds: 'memory' for a single worker, 'database' to share across workers
+    app.config['SEAT_HOLD_BACKEND'] = os.environ.get('SEAT_HOLD_BACKEND') or 'memory'
+    app.config['SEAT_HOLD_TTL'] = float(os.environ.get('SEAT_HOLD_TTL') or 120)
+    # Live seat map: delta poll interval and lifetime of one SSE connection
+    app.config['SEAT_STREAM_POLL_INTERVAL'] = float(os.environ.get('SEAT_STREAM_POLL_INTERVAL') or 2)
+    app.config['SEAT_STREAM_MAX_SECONDS'] = float(os.environ.get('SEAT_STREAM_MAX_SECONDS') or 55)
+    # Movies per page of the keyset-paginated listing
+    app.config['CATALOG_PAGE_SIZE'] = int(os.environ.get('CATALOG_PAGE_SIZE') or 24)
+    # Maximum number of rendered catalog pages kept in memory
+    app.config['PAGE_CACHE_SIZE'] = int(os.environ.get('PAGE_CACHE_SIZE') or 64)
+    # SQLite production mode: WAL journal, busy timeout (ms) and synchronous level
+    app.config['SQLITE_WAL'] = (os.environ.get('SQLITE_WAL') or 'false').lower() == 'true'
+    app.config['SQLITE_BUSY_TIMEOUT'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT') or 5000)
+    app.config['SQLITE_SYNCHRONOUS'] = os.environ.get('SQLITE_SYNCHRONOUS') or 'NORMAL'
+    # Booking writes: 'direct' from each request, 'queue' through one writer thread
+    app.config['BOOKING_WRITER'] = os.environ.get('BOOKING_WRITER') or 'direct'
+    # Warn at boot when the database schema is missing or older than the models
+    app.config['SCHEMA_CHECK'] = (os.environ.get('SCHEMA_CHECK') or 'true').lower() == 'true'
+    # Request/SQL/booking metrics at /metrics in Prometheus text format. The
+    # route needs a bearer token, and recording is on by default only with one
+    app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+    app.config['METRICS_ENABLED'] = (
+        os.environ.get('METRICS_ENABLED') or ('true' if app.config['METRICS_TOKEN'] else 'false')
+    ).lower() == 'true'
+    # Development aids: fraction of requests profiled with cProfile, and the
+    # N+1 query detector ('off', 'warn' or 'raise') with its repeat threshold
+    app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('PROFILE_SAMPLE_RATE') or 0)
+    app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR') or os.path.join(app.instance_path, 'profiles')
+    app.config['NPLUSONE_DETECT'] = os.environ.get('NPLUSONE_DETECT') or 'off'
+    app.config['NPLUSONE_THRESHOLD'] = int(os.environ.get('NPLUSONE_THRESHOLD') or 5)
+    # Optional read replica for GET requests, and how long a visitor keeps
+    # reading from the primary after a write (read-your-own-writes)
+    app.config['REPLICA_DATABASE_URL'] = os.environ.get('REPLICA_DATABASE_URL')
+    app.config['REPLICA_STICKY_SECONDS'] = float(os.environ.get('REPLICA_STICKY_SECONDS') or 5)
+    # Bearer token for /api/exports; exports are disabled while it is unset
+    app.config['EXPORT_TOKEN'] = os.environ.get('EXPORT_TOKEN')
+    # Compiled templates are kept on disk so a new worker does not recompile
+    # them on its first requests ('off' to disable)
+    app.config['TEMPLATE_CACHE_DIR'] = os.environ.get('TEMPLATE_CACHE_DIR') or os.path.join(app.instance_path, 'templates')
+    if config:
+        app.config.update(config)
+    if app.config['REPLICA_DATABASE_URL']:
+        from app.replicas import REPLICA_BIND
+        app.config.setdefault('SQLALCHEMY_BINDS', {})[REPLICA_BIND] = app.config['REPLICA_DATABASE_URL']
     
     # Initialize extensions
     from app.models import db
     db.init_app(app)
-    
+    if app.config['SQLITE_WAL']:
+        from app.sqlite import configure_sqlite
+        with app.app_context():
+            for engine in db.engines.values():
+                configure_sqlite(engine, app.config['SQLITE_BUSY_TIMEOUT'], app.config['SQLITE_SYNCHRONOUS'])
+    if app.config['REPLICA_DATABASE_URL']:
+        from app.replicas import init_replica
+        init_replica(app)
+    from app import catalog  # noqa: F401  (registers the catalog-version flush hook)
+    if app.config['TEMPLATE_CACHE_DIR'] != 'off':
+        from jinja2 import FileSystemBytecodeCache
+        os.makedirs(app.config['TEMPLATE_CACHE_DIR'], exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(app.config['TEMPLATE_CACHE_DIR'])
+
     # Register blueprints
     from app.movies import bp as movies_bp
     app.register_blueprint(movies_bp)
+    from app.api import bp as api_bp
+    app.register_blueprint(api_bp)
+    from app.assets import init_assets
+    init_assets(app)
+    if app.config['METRICS_ENABLED']:
+        from app.metrics import init_metrics
+        init_metrics(app)
+    if app.config['PROFILE_SAMPLE_RATE'] or app.config['NPLUSONE_DETECT'] != 'off':
+        from app.profiling import init_profiling
+        init_profiling(app)
     
-    # Create tables
-    with app.app_context():
-        db.create_all()
+    if app.config['SCHEMA_CHECK']:
+        from app.schema import check_schema_version
+        with app.app_context():
+            check_schema_version()
         
     return app
\ No newline at end of file
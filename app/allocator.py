@@ -0,0 +1,105 @@
+"""Best-available contiguous seat allocation.
+
+Seats in a ``SeatLayout`` are indexed row-major, so adjacent seats within one
+row occupy adjacent bits of the availability bitmap. For every layout and
+group size we precompute each candidate block (a run of adjacent seats that
+does not cross an aisle or walkway) as a bitmask with a quality score, sorted
+best first. Finding the best free blocks for a showtime is then a scan over
+those masks with one ``&`` per candidate, without touching the database.
+
+Quality favours the centre column and the middle seated row, which is where
+most people want to sit.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import NamedTuple
+
+from app.layouts import SeatLayout
+
+# Horizontal position matters a bit more than depth.
+COLUMN_WEIGHT = 0.6
+ROW_WEIGHT = 0.4
+
+
+class SeatBlock(NamedTuple):
+    seats: tuple[str, ...]
+    score: float
+    mask: int
+
+
+@lru_cache(maxsize=None)
+def seat_scores(layout: SeatLayout) -> tuple[float, ...]:
+    """Quality score in ``[0, 1]`` per seat, in ``layout.seats`` order."""
+    seated_rows = sorted({row for row, _ in layout.coordinates.values()})
+    if not seated_rows:
+        return ()
+    middle_row = (seated_rows[0] + seated_rows[-1]) / 2
+    row_span = max(middle_row - seated_rows[0], 1)
+    centre_column = (layout.columns - 1) / 2
+    column_span = max(centre_column, 1)
+
+    scores = []
+    for seat_id in layout.seats:
+        row, column = layout.coordinates[seat_id]
+        column_score = 1 - abs(column - centre_column) / column_span
+        row_score = 1 - abs(row - middle_row) / row_span
+        scores.append(COLUMN_WEIGHT * column_score + ROW_WEIGHT * row_score)
+    return tuple(scores)
+
+
+@lru_cache(maxsize=None)
+def _segments(layout: SeatLayout) -> tuple[tuple[int, ...], ...]:
+    """Runs of physically adjacent seats, as seat indices, per row."""
+    segments = []
+    for row in layout.grid:
+        run: list[int] = []
+        for seat_id in row:
+            if seat_id is None:
+                if run:
+                    segments.append(tuple(run))
+                run = []
+            else:
+                run.append(layout.index[seat_id])
+        if run:
+            segments.append(tuple(run))
+    return tuple(segments)
+
+
+@lru_cache(maxsize=256)
+def candidate_blocks(layout: SeatLayout, count: int) -> tuple[SeatBlock, ...]:
+    """Every block of ``count`` adjacent seats, best score first."""
+    scores = seat_scores(layout)
+    blocks = []
+    for segment in _segments(layout):
+        for start in range(len(segment) - count + 1):
+            indices = segment[start:start + count]
+            mask = 0
+            for index in indices:
+                mask |= 1 << index
+            score = sum(scores[index] for index in indices) / count
+            blocks.append(SeatBlock(tuple(layout.seats[i] for i in indices), round(score, 4), mask))
+    blocks.sort(key=lambda block: (-block.score, block.seats))
+    return tuple(blocks)
+
+
+def best_available(layout: SeatLayout, occupied: int, count: int, limit: int = 3) -> list[SeatBlock]:
+    """Return up to ``limit`` non-overlapping free blocks of ``count`` seats.
+
+    ``occupied`` is the bitmap of seats that cannot be offered (booked, and
+    usually also held by others).
+    """
+    if count < 1 or limit < 1:
+        return []
+
+    chosen: list[SeatBlock] = []
+    for block in candidate_blocks(layout, count):
+        if block.mask & occupied:
+            continue
+        chosen.append(block)
+        if len(chosen) == limit:
+            break
+        # Later suggestions must not reuse seats of earlier ones.
+        occupied |= block.mask
+    return chosen
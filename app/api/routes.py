@@ -0,0 +1,195 @@
+import json
+import time
+from datetime import date
+
+from flask import Response, abort, current_app, jsonify, request, stream_with_context
+
+from app.api import bp
+from app.models import db, Showtime
+
+# Comment line sent when nothing happened, so proxies keep the stream open
+KEEPALIVE_SECONDS = 15
+# Largest page of search results
+MAX_SEARCH_RESULTS = 100
+
+
+def _no_store(response):
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+def _seat_snapshot(showtime_id):
+    from app.availability import get_availability
+    from app.holds import get_hold_store, holder_token
+
+    availability = get_availability(showtime_id)
+    holder = holder_token()
+    held = sorted(
+        seat_id for seat_id, owner in get_hold_store().held_seats(showtime_id).items()
+        if owner != holder
+    )
+    return {
+        'showtime_id': showtime_id,
+        'version': availability.version,
+        'capacity': availability.layout.capacity,
+        'taken': availability.taken_seats(),
+        'held': held,
+    }
+
+
+@bp.route('/showtimes/<int:showtime_id>/seats')
+def seat_state(showtime_id):
+    """Seat state of a showtime; ``?since=<version>`` returns only new bookings.
+
+    ``version`` is the highest booking id seen for the showtime. A client keeps
+    the last version it received and asks for the delta after it.
+    """
+    from app.availability import bookings_since
+
+    Showtime.query.get_or_404(showtime_id)
+
+    since = request.args.get('since', type=int)
+    if since is None:
+        return _no_store(jsonify(_seat_snapshot(showtime_id)))
+
+    version, seats = bookings_since(showtime_id, since)
+    return _no_store(jsonify(showtime_id=showtime_id, since=since, version=version, booked=seats))
+
+
+def _sse(event, data, event_id=None):
+    lines = [f'event: {event}']
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'data: {json.dumps(data, separators=(",", ":"))}')
+    return '\n'.join(lines) + '\n\n'
+
+
+@bp.route('/showtimes/<int:showtime_id>/seats/stream')
+def seat_stream(showtime_id):
+    """Server-Sent Events stream of newly booked seats for a showtime.
+
+    Sends a ``snapshot`` event on connect (unless the client resumes with
+    ``Last-Event-ID``), then a ``booked`` event per batch of new bookings. The
+    stream ends after ``SEAT_STREAM_MAX_SECONDS``; EventSource reconnects and
+    resumes from the last event id.
+    """
+    from app.availability import bookings_since, wait_for_change
+
+    Showtime.query.get_or_404(showtime_id)
+
+    resume_from = request.headers.get('Last-Event-ID', type=int)
+    if resume_from is None:
+        resume_from = request.args.get('since', type=int)
+    snapshot = _seat_snapshot(showtime_id) if resume_from is None else None
+    # Release the connection; the stream only borrows one per poll.
+    db.session.close()
+
+    poll_interval = float(current_app.config.get('SEAT_STREAM_POLL_INTERVAL', 2))
+    max_seconds = float(current_app.config.get('SEAT_STREAM_MAX_SECONDS', 55))
+
+    def events():
+        version = resume_from
+        yield f'retry: {int(poll_interval * 1000)}\n\n'
+        if snapshot is not None:
+            version = snapshot['version']
+            yield _sse('snapshot', snapshot, version)
+
+        deadline = time.monotonic() + max_seconds
+        last_sent = time.monotonic()
+        while time.monotonic() < deadline:
+            new_version, seats = bookings_since(showtime_id, version)
+            db.session.close()
+            if seats:
+                version = new_version
+                last_sent = time.monotonic()
+                yield _sse('booked', {'version': version, 'seats': seats}, version)
+            elif time.monotonic() - last_sent >= KEEPALIVE_SECONDS:
+                last_sent = time.monotonic()
+                yield ': keep-alive\n\n'
+            # Bookings made by this process wake us early; others are polled.
+            wait_for_change(poll_interval)
+
+    response = Response(stream_with_context(events()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@bp.route('/search')
+def search():
+    """Title and genre search: ``?q=<words>&genre=<name>&genre=<name>&limit=20``.
+
+    Answered from the in-memory index without touching the movie tables.
+    """
+    from app.search import get_search_index
+
+    query = request.args.get('q', '').strip()
+    genres = [name for name in request.args.getlist('genre') if name.strip()]
+    limit = min(max(request.args.get('limit', 20, type=int), 1), MAX_SEARCH_RESULTS)
+
+    index = get_search_index()
+    movie_ids = index.search(query, genres)
+    return jsonify(
+        query=query,
+        genres=genres,
+        total=len(movie_ids),
+        movies=[
+            {
+                'id': movie_id,
+                'title': index.title_of[movie_id],
+                'studio_number': index.studio_of[movie_id],
+                'genres': index.genres_of.get(movie_id, []),
+            }
+            for movie_id in movie_ids[:limit]
+        ],
+    )
+
+
+def _export_authorized():
+    from app.tokens import bearer_token_matches
+
+    token = current_app.config.get('EXPORT_TOKEN')
+    if not token:
+        # Exports are disabled until a token is configured
+        abort(404)
+    return bearer_token_matches(token)
+
+
+@bp.route('/exports/<kind>')
+def export(kind):
+    """Stream bookings or showtimes as CSV or NDJSON.
+
+    Requires ``Authorization: Bearer <EXPORT_TOKEN>``. Query parameters:
+    ``format`` (csv or ndjson), ``from``/``to`` (local show dates, inclusive),
+    ``movie_id`` and ``archived=1`` for the archive tables.
+    """
+    if not _export_authorized():
+        response = jsonify(error='invalid or missing export token')
+        response.headers['WWW-Authenticate'] = 'Bearer'
+        return response, 401
+    # Exports are optional; their module loads on the first authorised call
+    from app.exports import EXPORT_FORMATS, EXPORT_KINDS, MIMETYPES, export_query, stream_export
+
+    if kind not in EXPORT_KINDS:
+        abort(404)
+
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify(error=f'format must be one of {", ".join(EXPORT_FORMATS)}'), 400
+    try:
+        date_from, date_to = (
+            date.fromisoformat(request.args[name]) if request.args.get(name) else None
+            for name in ('from', 'to')
+        )
+    except ValueError:
+        return jsonify(error='from and to must be YYYY-MM-DD dates'), 400
+    statement = export_query(
+        kind, date_from, date_to,
+        movie_id=request.args.get('movie_id', type=int),
+        archived=request.args.get('archived', '').lower() in ('1', 'true'),
+    )
+
+    response = Response(stream_with_context(stream_export(statement, fmt)), mimetype=MIMETYPES[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename="{kind}.{fmt}"'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
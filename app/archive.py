@@ -0,0 +1,104 @@
+"""Cold storage for past showtimes and their bookings.
+
+``purge_past_showtimes`` only flags rows, so without this job ``showtimes`` and
+``bookings`` grow forever and every hot query scans past dead rows. The
+archiver copies past showtimes and their bookings into ``archived_showtimes``
+and ``archived_bookings`` (keeping their ids) and deletes them from the live
+tables. Only showtimes that are over are moved: a slot the scheduler flagged
+``is_archived`` may still have tickets sold, so it stays live until it passes
+the cutoff like any other. Live ids use SQLite AUTOINCREMENT, so an archived
+id is never handed out again.
+
+Work is done in chunks of ``chunk_size`` showtimes. Each chunk is a short
+transaction of ``INSERT ... SELECT`` and ``DELETE`` statements, so locks are
+held for milliseconds at a time and an interrupted run resumes where it stopped.
+Chunks are walked by primary key, so a run reads the live table once.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import DateTime, delete, insert, literal, select
+
+from app.models import db, ArchivedBooking, ArchivedShowtime, Booking, SeatHold, Showtime
+
+ARCHIVE_CHUNK_SIZE = 100
+
+
+@dataclass
+class ArchiveReport:
+    showtimes: int = 0
+    bookings: int = 0
+    batches: int = 0
+    elapsed: float = 0.0
+
+
+def _archive_chunk(showtime_ids: list[int], archived_at: datetime) -> int:
+    """Move one chunk of showtimes with their bookings; return the booking count."""
+    db.session.execute(
+        insert(ArchivedShowtime).from_select(
+            ['id', 'movie_id', 'time', 'local_date', 'created_at', 'archived_at'],
+            select(
+                Showtime.id, Showtime.movie_id, Showtime.time, Showtime.local_date,
+                Showtime.created_at, literal(archived_at, DateTime),
+            ).where(Showtime.id.in_(showtime_ids)),
+        )
+    )
+    moved = db.session.execute(
+        insert(ArchivedBooking).from_select(
+            ['id', 'user', 'seat', 'showtime_id', 'created_at', 'archived_at'],
+            select(
+                Booking.id, Booking.user, Booking.seat, Booking.showtime_id,
+                Booking.created_at, literal(archived_at, DateTime),
+            ).where(Booking.showtime_id.in_(showtime_ids)),
+        )
+    ).rowcount
+
+    for statement in (
+        delete(SeatHold).where(SeatHold.showtime_id.in_(showtime_ids)),
+        delete(Booking).where(Booking.showtime_id.in_(showtime_ids)),
+        delete(Showtime).where(Showtime.id.in_(showtime_ids)),
+    ):
+        db.session.execute(statement.execution_options(synchronize_session=False))
+    db.session.commit()
+    return moved
+
+
+def archive_past_showtimes(
+    keep_days: int = 1,
+    chunk_size: int = ARCHIVE_CHUNK_SIZE,
+    pause: float = 0.0,
+    max_batches: int | None = None,
+) -> ArchiveReport:
+    """Move showtimes that started more than ``keep_days`` ago to the archive tables.
+
+    ``pause`` sleeps between chunks to leave room for booking traffic;
+    ``max_batches`` bounds a single run.
+    """
+    report = ArchiveReport()
+    started = time.perf_counter()
+    cutoff = datetime.utcnow() - timedelta(days=keep_days)
+    last_id = 0
+
+    while max_batches is None or report.batches < max_batches:
+        showtime_ids = list(db.session.scalars(
+            select(Showtime.id)
+            .where(Showtime.id > last_id, Showtime.time < cutoff)
+            .order_by(Showtime.id)
+            .limit(chunk_size)
+        ))
+        if not showtime_ids:
+            break
+
+        report.bookings += _archive_chunk(showtime_ids, datetime.utcnow())
+        report.showtimes += len(showtime_ids)
+        report.batches += 1
+        last_id = showtime_ids[-1]
+        if pause:
+            time.sleep(pause)
+
+    report.elapsed = time.perf_counter() - started
+    return report
@@ -0,0 +1,138 @@
+"""Fingerprinted, precompressed CSS bundles.
+
+Stylesheets live in ``app/static/css``. ``flask build-assets`` minifies each
+one, names the result after a hash of its content (``base.3f9a1c2e.css``),
+writes gzip and, when the ``brotli`` package is installed, brotli copies next
+to it in ``app/static/dist``, and records the mapping in ``manifest.json``.
+
+Templates link stylesheets through ``asset_url('css/base.css')``. With a
+manifest the URL points at ``/assets/<hashed name>``, served with a one-year
+``immutable`` cache lifetime and the best encoding the client accepts; a
+changed file gets a new name, so browsers never need to revalidate. Without a
+manifest (a fresh checkout) the helper falls back to the plain static file,
+so a build is only needed for production.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import re
+
+from flask import Blueprint, Flask, abort, current_app, request, send_from_directory, url_for
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+SOURCE_DIR = 'css'
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_NAME = 'manifest.json'
+# One year: hashed names never change content
+IMMUTABLE_MAX_AGE = 31536000
+
+# Content encodings in order of preference, with their file suffix
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+_STRINGS = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')')
+_COMMENTS = re.compile(r'/\*.*?\*/', re.S)
+_AROUND_PUNCTUATION = re.compile(r'\s*([{};,>])\s*')
+_AFTER_COLON = re.compile(r':\s+')
+
+bp = Blueprint('assets', __name__, url_prefix='/assets')
+
+
+def minify_css(css: str) -> str:
+    """Strip comments and redundant whitespace; quoted strings are left untouched."""
+    parts = _STRINGS.split(_COMMENTS.sub('', css))
+    for index in range(0, len(parts), 2):
+        code = ' '.join(parts[index].split())
+        code = _AROUND_PUNCTUATION.sub(r'\1', code)
+        parts[index] = _AFTER_COLON.sub(':', code).replace(';}', '}')
+    return ''.join(parts).strip()
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def build_assets(static_dir: str = STATIC_DIR, dist_dir: str = DIST_DIR) -> dict[str, dict]:
+    """Minify, fingerprint and precompress every stylesheet; return the manifest."""
+    brotli = _brotli()
+    os.makedirs(dist_dir, exist_ok=True)
+    # Outputs of earlier builds are replaced, not accumulated
+    for name in os.listdir(dist_dir):
+        os.remove(os.path.join(dist_dir, name))
+
+    manifest = {}
+    source_dir = os.path.join(static_dir, SOURCE_DIR)
+    for name in sorted(os.listdir(source_dir)):
+        if not name.endswith('.css'):
+            continue
+        with open(os.path.join(source_dir, name), encoding='utf-8') as fh:
+            source = fh.read()
+        body = minify_css(source).encode('utf-8')
+        stem = name[:-len('.css')]
+        hashed = f'{stem}.{hashlib.sha256(body).hexdigest()[:12]}.css'
+
+        outputs = {'': body, '.gz': gzip.compress(body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            outputs['.br'] = brotli.compress(body, quality=11)
+        for suffix, data in outputs.items():
+            with open(os.path.join(dist_dir, hashed + suffix), 'wb') as fh:
+                fh.write(data)
+
+        manifest[f'{SOURCE_DIR}/{name}'] = {
+            'file': hashed,
+            'bytes': len(source.encode('utf-8')),
+            'sizes': {suffix.lstrip('.') or 'min': len(data) for suffix, data in outputs.items()},
+        }
+
+    with open(os.path.join(dist_dir, MANIFEST_NAME), 'w', encoding='utf-8') as fh:
+        json.dump(manifest, fh, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest(dist_dir: str = DIST_DIR) -> dict[str, str]:
+    """``{'css/base.css': 'base.<hash>.css'}``, or an empty dict when nothing is built."""
+    try:
+        with open(os.path.join(dist_dir, MANIFEST_NAME), encoding='utf-8') as fh:
+            return {name: entry['file'] for name, entry in json.load(fh).items()}
+    except FileNotFoundError:
+        return {}
+
+
+def asset_url(name: str) -> str:
+    hashed = current_app.extensions['assets'].get(name)
+    if hashed is None:
+        return url_for('static', filename=name)
+    return url_for('assets.built_asset', filename=hashed)
+
+
+@bp.route('/<path:filename>')
+def built_asset(filename):
+    """Serve a fingerprinted bundle, precompressed when the client accepts it."""
+    if filename not in current_app.extensions['assets'].values():
+        abort(404)
+
+    accepted = request.accept_encodings
+    for encoding, suffix in ENCODINGS:
+        if accepted[encoding] and os.path.exists(os.path.join(DIST_DIR, filename + suffix)):
+            response = send_from_directory(DIST_DIR, filename + suffix, mimetype='text/css', max_age=IMMUTABLE_MAX_AGE)
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(DIST_DIR, filename, mimetype='text/css', max_age=IMMUTABLE_MAX_AGE)
+    response.headers['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+def init_assets(app: Flask) -> None:
+    """Load the manifest, register the asset route and the ``asset_url`` template helper."""
+    app.extensions['assets'] = load_manifest()
+    app.register_blueprint(bp)
+    app.add_template_global(asset_url)
@@ -0,0 +1,247 @@
+"""Compact per-showtime seat availability.
+
+The seat chart only needs to know which seats are taken, so instead of loading
+full ``Booking`` rows on every request we keep one integer bitmap per showtime.
+Bit ``i`` is set when the seat with ``layout.index[seat] == i`` is booked, where
+``layout`` is the compiled ``SeatLayout`` of the showtime's studio. The same
+read keeps the booker's name per seat, which the chart shows on taken seats.
+
+Each cached bitmap carries a ``version``: a booking id such that every booking
+of the showtime with an id up to it is in the bitmap. The booking paths take
+the showtime's row lock (the ``seats_booked`` update) before inserting, so
+within one showtime ids become visible in id order and "everything after
+``version``" is a complete delta.
+
+Snapshots are updated in place when this process commits a booking and expire
+after ``SEAT_AVAILABILITY_TTL`` seconds so bookings made by other workers show
+up without a restart. Bookings folded in this way set their bits, but only
+move ``version`` when they are known to follow it directly; other workers may
+have committed ids in between, and a version that skipped them would hide
+those seats from ``bookings_since`` for good. Double booking is still prevented by the
+``uq_booking_showtime_seat`` constraint; the cache only drives the display.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Iterable
+
+from flask import current_app
+from sqlalchemy import select
+
+from app.cache import LRUCache
+from app.layouts import SeatLayout, layout_for_studio
+from app.models import db, Booking, Movie, Showtime
+
+DEFAULT_TTL_SECONDS = 5.0
+CACHE_SIZE = 4096
+
+
+class SeatAvailability:
+    """Immutable snapshot of the booked seats for one showtime."""
+
+    __slots__ = ('showtime_id', 'layout', 'bits', 'version', 'loaded_at', 'users')
+
+    def __init__(
+        self,
+        showtime_id: int,
+        layout: SeatLayout,
+        bits: int,
+        version: int,
+        loaded_at: float,
+        users: dict[str, str] | None = None,
+    ) -> None:
+        self.showtime_id = showtime_id
+        self.layout = layout
+        self.bits = bits
+        self.version = version
+        self.loaded_at = loaded_at
+        # Booker's name per taken seat, for the chart's tooltips
+        self.users = users if users is not None else {}
+
+    def __contains__(self, seat_id: object) -> bool:
+        index = self.layout.index.get(seat_id)  # type: ignore[arg-type]
+        return index is not None and bool((self.bits >> index) & 1)
+
+    @property
+    def taken_count(self) -> int:
+        return self.bits.bit_count()
+
+    def taken_seats(self) -> list[str]:
+        """Return the booked seat ids in layout order."""
+        bits = self.bits
+        return [seat_id for index, seat_id in enumerate(self.layout.seats) if (bits >> index) & 1]
+
+    def __repr__(self) -> str:
+        return f'<SeatAvailability showtime={self.showtime_id} v{self.version} taken={self.taken_count}>'
+
+
+def seats_to_bits(layout: SeatLayout, seats: Iterable[str]) -> int:
+    """Fold seat ids into a bitmap, ignoring ids that are not in the layout."""
+    bits = 0
+    for seat_id in seats:
+        index = layout.index.get(seat_id)
+        if index is not None:
+            bits |= 1 << index
+    return bits
+
+
+# A showtime never changes studio, so its layout is cached without expiry.
+_layouts = LRUCache(maxsize=CACHE_SIZE)
+
+
+def layout_for_showtime(showtime_id: int, studio_number: int | None = None) -> SeatLayout:
+    """Return the seat layout of a showtime's studio.
+
+    Callers that already loaded the movie pass ``studio_number`` to skip the
+    lookup query; otherwise a miss costs one query.
+    """
+    layout = _layouts.get(showtime_id)
+    if layout is None:
+        if studio_number is None:
+            studio_number = db.session.scalar(
+                select(Movie.studio_number)
+                .join(Showtime, Showtime.movie_id == Movie.id)
+                .where(Showtime.id == showtime_id)
+            )
+        layout = layout_for_studio(studio_number)
+        if studio_number is not None:
+            _layouts.set(showtime_id, layout)
+    return layout
+
+
+_cache = LRUCache(maxsize=CACHE_SIZE)
+_write_lock = threading.Lock()
+# Notified whenever this process records bookings; wakes seat-map streams.
+_changed = threading.Condition()
+# Bumped on every write so a slow load never overwrites a fresher snapshot.
+_generation = 0
+
+
+def _ttl() -> float:
+    return float(current_app.config.get('SEAT_AVAILABILITY_TTL', DEFAULT_TTL_SECONDS))
+
+
+def _load(showtime_id: int) -> SeatAvailability:
+    generation = _generation
+    layout = layout_for_showtime(showtime_id)
+    rows = db.session.execute(
+        select(Booking.id, Booking.seat, Booking.user).where(Booking.showtime_id == showtime_id)
+    ).all()
+
+    index_of = layout.index.get
+    bits = 0
+    version = 0
+    users = {}
+    for booking_id, seat_id, user in rows:
+        index = index_of(seat_id)
+        if index is not None:
+            bits |= 1 << index
+            users[seat_id] = user
+        if booking_id > version:
+            version = booking_id
+
+    snapshot = SeatAvailability(showtime_id, layout, bits, version, time.monotonic(), users)
+    with _write_lock:
+        if generation == _generation:
+            _cache.set(showtime_id, snapshot)
+    return snapshot
+
+
+def get_availability(showtime_id: int) -> SeatAvailability:
+    """Return the seat bitmap for a showtime, loading it on a miss or expiry."""
+    snapshot = _cache.get(showtime_id)
+    if snapshot is not None and time.monotonic() - snapshot.loaded_at < _ttl():
+        return snapshot
+    return _load(showtime_id)
+
+
+def record_bookings(
+    showtime_id: int,
+    seats: Iterable[str],
+    booking_ids: Iterable[int] = (),
+    user: str | None = None,
+) -> None:
+    """Fold bookings committed by this process into the cached bitmap."""
+    seats = list(seats)
+    ids = sorted(booking_ids)
+    # Consecutive ids leave no room for anyone else's booking among them
+    contiguous = bool(ids) and ids[-1] - ids[0] == len(ids) - 1
+    users = dict.fromkeys(seats, user) if user is not None else {}
+    _fold(showtime_id, seats, ids, ids[0] - 1 if contiguous else None, users)
+    with _changed:
+        _changed.notify_all()
+
+
+def _fold(
+    showtime_id: int,
+    seats: Iterable[str],
+    booking_ids: list[int],
+    since: int | None,
+    users: dict[str, str],
+) -> None:
+    """Set the bits of ``seats``; advance the version only across a complete range.
+
+    ``since`` is an id such that ``booking_ids`` are all of the showtime's
+    bookings above it, or ``None`` when that is not known. ``users`` maps the
+    seats to their bookers' names where those are known.
+    """
+    global _generation
+
+    with _write_lock:
+        _generation += 1
+        snapshot = _cache.get(showtime_id)
+        if snapshot is not None:
+            version = snapshot.version
+            if since is not None and since <= version:
+                version = max(version, *booking_ids)
+            _cache.set(
+                showtime_id,
+                SeatAvailability(
+                    showtime_id,
+                    snapshot.layout,
+                    snapshot.bits | seats_to_bits(snapshot.layout, seats),
+                    version,
+                    snapshot.loaded_at,
+                    {**snapshot.users, **users} if users else snapshot.users,
+                ),
+            )
+
+
+def invalidate(showtime_id: int | None = None) -> None:
+    """Drop one cached showtime, or every showtime when no id is given."""
+    global _generation
+    with _write_lock:
+        _generation += 1
+        if showtime_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(showtime_id)
+
+
+def bookings_since(showtime_id: int, version: int) -> tuple[int, list[str]]:
+    """Return ``(new_version, seats)`` for bookings with an id above ``version``.
+
+    Reads only the new rows, so clients that already hold a snapshot pay for
+    the delta instead of the full seat map. The rows are folded into the
+    cached bitmap on the way.
+    """
+    rows = db.session.execute(
+        select(Booking.id, Booking.seat, Booking.user)
+        .where(Booking.showtime_id == showtime_id, Booking.id > version)
+        .order_by(Booking.id)
+    ).all()
+    if not rows:
+        return version, []
+
+    seats = [seat_id for _, seat_id, _ in rows]
+    ids = [booking_id for booking_id, _, _ in rows]
+    _fold(showtime_id, seats, ids, version, {seat_id: user for _, seat_id, user in rows})
+    return ids[-1], seats
+
+
+def wait_for_change(timeout: float) -> None:
+    """Block until this process records a booking or ``timeout`` elapses."""
+    with _changed:
+        _changed.wait(timeout)
@@ -0,0 +1,184 @@
+"""Seat booking service shared by the HTML form and the JSON API.
+
+All seats of a request are written in one transaction with a single bulk
+``INSERT``. Either every seat is booked or none is, and the caller learns
+exactly which seats were unknown to the layout or already taken.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from flask import current_app
+
+from app.availability import get_availability, layout_for_showtime, record_bookings, seats_to_bits
+from app.holds import get_hold_store
+from app.models import db, Booking
+from app.seat_counts import add_seats_booked
+
+
+class BookingUnavailable(RuntimeError):
+    """The booking could not be written; nothing was stored and it can be retried."""
+
+
+@dataclass
+class BookingResult:
+    """Outcome of a booking attempt; ``booked`` is empty unless it succeeded."""
+
+    booked: list[str] = field(default_factory=list)
+    conflicts: list[str] = field(default_factory=list)
+    invalid: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return bool(self.booked)
+
+
+def parse_seats(values: Iterable[str] | str | None) -> list[str]:
+    """Normalise seat input into unique seat ids, preserving the given order.
+
+    Accepts a single string, a list of strings, or comma separated values so
+    ``seat=A1&seat=A2``, ``seat=A1,A2`` and ``["A1", "A2"]`` all work.
+    """
+    if values is None:
+        return []
+    if isinstance(values, str):
+        values = [values]
+
+    seats: dict[str, None] = {}
+    for value in values:
+        if not isinstance(value, str):
+            continue
+        for part in value.split(','):
+            seat_id = part.strip().upper()
+            if seat_id:
+                seats.setdefault(seat_id, None)
+    return list(seats)
+
+
+def count_conflict(stage: str) -> None:
+    """Count a lost seat in the metrics; the module loads only when they are enabled."""
+    if current_app.config.get('METRICS_ENABLED'):
+        from app.metrics import count_booking_conflict
+        count_booking_conflict(stage)
+
+
+def _taken(showtime_id: int, seats: list[str]) -> list[str]:
+    rows = db.session.scalars(
+        select(Booking.seat).where(
+            Booking.showtime_id == showtime_id,
+            Booking.seat.in_(seats),
+        )
+    )
+    taken = set(rows)
+    return [seat_id for seat_id in seats if seat_id in taken]
+
+
+def book_seats(
+    showtime_id: int,
+    user: str,
+    seats: list[str],
+    holder: str | None = None,
+) -> BookingResult:
+    """Book ``seats`` for ``user`` atomically.
+
+    Seats are validated against the studio's layout (a set lookup per seat)
+    before any booking query, then
+    checked against the cached availability bitmap and against holds owned by
+    someone other than ``holder``, so obviously lost seats never cost a write.
+    The remaining request is one bulk insert and one commit that also converts
+    the seat holds; a unique-constraint race is resolved by reporting which of
+    the requested seats now exist. With ``BOOKING_WRITER=queue`` the write is
+    handed to the single writer thread instead.
+    """
+    layout = layout_for_showtime(showtime_id)
+    invalid = [seat_id for seat_id in seats if seat_id not in layout]
+    if invalid:
+        return BookingResult(invalid=invalid)
+
+    availability = get_availability(showtime_id)
+    conflicts = [seat_id for seat_id in seats if seat_id in availability]
+    if conflicts:
+        count_conflict('precheck')
+        return BookingResult(conflicts=conflicts)
+
+    held = get_hold_store().held_seats(showtime_id)
+    conflicts = [seat_id for seat_id in seats if seat_id in held and held[seat_id] != holder]
+    if conflicts:
+        count_conflict('precheck')
+        return BookingResult(conflicts=conflicts)
+
+    if current_app.config.get('BOOKING_WRITER', 'direct') != 'direct':
+        # Only queue mode needs the writer thread and its imports
+        from app.booking_writer import get_booking_writer
+
+        return get_booking_writer().book(showtime_id, user, seats, holder)
+    return write_bookings(showtime_id, user, seats)
+
+
+def write_bookings(showtime_id: int, user: str, seats: list[str]) -> BookingResult:
+    """Insert already validated seats in one transaction and convert their holds."""
+    hold_store = get_hold_store()
+    try:
+        # The counter update takes the showtime's row lock before any id is
+        # allocated, so the showtime's bookings commit in id order.
+        add_seats_booked({showtime_id: len(seats)})
+        booking_ids = db.session.scalars(
+            insert(Booking).returning(Booking.id),
+            [
+                {'user': user, 'seat': seat_id, 'showtime_id': showtime_id}
+                for seat_id in seats
+            ],
+        ).all()
+        if hold_store.transactional:
+            hold_store.consume(showtime_id, seats)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        count_conflict('constraint')
+        # Someone else committed first; report the seats that beat us.
+        return BookingResult(conflicts=_taken(showtime_id, seats) or list(seats))
+
+    if not hold_store.transactional:
+        # In-memory holds go only once the seats are really booked
+        hold_store.consume(showtime_id, seats)
+    record_bookings(showtime_id, seats, booking_ids, user)
+    return BookingResult(booked=list(seats))
+
+
+def occupied_bits(showtime_id: int, holder: str | None = None) -> int:
+    """Bitmap of seats that cannot be offered: booked or held by someone else."""
+    availability = get_availability(showtime_id)
+    held_by_others = [
+        seat_id for seat_id, owner in get_hold_store().held_seats(showtime_id).items()
+        if owner != holder
+    ]
+    return availability.bits | seats_to_bits(availability.layout, held_by_others)
+
+
+def book_best_available(
+    showtime_id: int,
+    user: str,
+    count: int,
+    holder: str | None = None,
+    attempts: int = 3,
+) -> BookingResult:
+    """Book the best block of ``count`` adjacent seats.
+
+    Tries the top ``attempts`` blocks in order, so losing a race for the best
+    block falls through to the next one. An empty result means no block of
+    that size is free.
+    """
+    from app.allocator import best_available
+
+    layout = layout_for_showtime(showtime_id)
+    result = BookingResult()
+    for block in best_available(layout, occupied_bits(showtime_id, holder), count, limit=attempts):
+        result = book_seats(showtime_id, user, list(block.seats), holder=holder)
+        if result.ok:
+            return result
+    return result
@@ -0,0 +1,213 @@
+"""Single-writer booking queue with group commit.
+
+SQLite allows one writer at a time. When every request thread writes its own
+bookings they queue up on the database lock, retry, and throughput collapses
+as concurrency grows. With ``BOOKING_WRITER=queue`` request threads validate
+their seats as usual and then hand the write to one thread per process.
+
+The writer takes whatever requests are waiting (up to ``MAX_BATCH``), opens
+one ``BEGIN IMMEDIATE`` transaction, checks each request against the
+bookings table and the seats claimed earlier in the same batch, inserts every
+accepted seat with one bulk ``INSERT`` and commits once. Each request still
+gets its own ``BookingResult``: requests that lose a seat to an earlier one in
+the batch are reported as conflicts without affecting the others.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+from collections import defaultdict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import NamedTuple
+
+from flask import Flask, current_app
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from app.availability import record_bookings
+from app.booking import BookingResult, BookingUnavailable, count_conflict, write_bookings
+from app.holds import get_hold_store
+from app.models import db, Booking
+from app.seat_counts import add_seats_booked
+from app.sqlite import begin_immediate
+
+# Requests committed together at most
+MAX_BATCH = 64
+# Seconds a request thread waits for the writer before giving up
+RESULT_TIMEOUT = 30.0
+
+
+class PendingBooking(NamedTuple):
+    showtime_id: int
+    user: str
+    seats: list[str]
+    holder: str | None
+    future: Future
+
+
+class BookingWriter:
+    """Owns the writer thread of one app and the queue feeding it."""
+
+    def __init__(self, app: Flask, max_batch: int = MAX_BATCH) -> None:
+        self._app = app
+        self._max_batch = max_batch
+        self._queue: queue.SimpleQueue[PendingBooking] = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.requests = 0
+
+    def submit(self, showtime_id: int, user: str, seats: list[str], holder: str | None = None) -> Future:
+        """Queue a validated booking and return a future for its ``BookingResult``."""
+        self._ensure_thread()
+        future: Future = Future()
+        self._queue.put(PendingBooking(showtime_id, user, list(seats), holder, future))
+        return future
+
+    def book(self, showtime_id: int, user: str, seats: list[str], holder: str | None = None):
+        """Queue a booking and wait for its result.
+
+        The caller's read transaction is ended first so its pooled connection
+        is free while it waits; otherwise busy request threads could exhaust
+        the pool and starve the writer.
+
+        Raises ``BookingUnavailable`` when the batch failed (it was rolled
+        back) or the request was still queued after ``RESULT_TIMEOUT`` (it is
+        cancelled, so it can never commit later). A request the writer has
+        already started is waited for, so its outcome is never lost.
+        """
+        db.session.rollback()
+        future = self.submit(showtime_id, user, seats, holder)
+        try:
+            return future.result(RESULT_TIMEOUT)
+        except FutureTimeoutError:
+            if future.cancel():
+                raise BookingUnavailable('booking queue is busy') from None
+            return self._settle(future)
+        except Exception as exc:
+            raise BookingUnavailable('booking write failed') from exc
+
+    @staticmethod
+    def _settle(future: Future):
+        try:
+            return future.result()
+        except Exception as exc:
+            raise BookingUnavailable('booking write failed') from exc
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='booking-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            # Group commit: everything that queued up while the last batch
+            # was being written goes into this one.
+            while len(batch) < self._max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            # Requests that timed out while queued were cancelled; skip them
+            batch = [pending for pending in batch if pending.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            with self._app.app_context():
+                try:
+                    self._write(batch)
+                except Exception as exc:
+                    db.session.rollback()
+                    for pending in batch:
+                        if not pending.future.done():
+                            pending.future.set_exception(exc)
+                finally:
+                    db.session.remove()
+            self.batches += 1
+            self.requests += len(batch)
+
+    def _write(self, batch: list[PendingBooking]) -> None:
+        begin_immediate(db.session.connection())
+
+        hold_store = get_hold_store()
+        by_showtime: dict[int, list[PendingBooking]] = defaultdict(list)
+        for pending in batch:
+            by_showtime[pending.showtime_id].append(pending)
+
+        accepted: list[PendingBooking] = []
+        for showtime_id, pendings in by_showtime.items():
+            requested = {seat_id for pending in pendings for seat_id in pending.seats}
+            taken = set(db.session.scalars(
+                select(Booking.seat).where(Booking.showtime_id == showtime_id, Booking.seat.in_(requested))
+            ))
+            held = hold_store.held_seats(showtime_id)
+            for pending in pendings:
+                conflicts = [
+                    seat_id for seat_id in pending.seats
+                    if seat_id in taken or held.get(seat_id, pending.holder) != pending.holder
+                ]
+                if conflicts:
+                    count_conflict('batch')
+                    pending.future.set_result(BookingResult(conflicts=conflicts))
+                    continue
+                taken.update(pending.seats)
+                accepted.append(pending)
+
+        if not accepted:
+            db.session.rollback()
+            return
+
+        rows = [
+            {'user': pending.user, 'seat': seat_id, 'showtime_id': pending.showtime_id}
+            for pending in accepted
+            for seat_id in pending.seats
+        ]
+        booked: dict[int, int] = defaultdict(int)
+        for pending in accepted:
+            booked[pending.showtime_id] += len(pending.seats)
+        try:
+            # Counters first, as in write_bookings: row locks before ids
+            add_seats_booked(booked)
+            booking_ids = db.session.scalars(
+                insert(Booking).returning(Booking.id, sort_by_parameter_order=True), rows
+            ).all()
+            if hold_store.transactional:
+                for pending in accepted:
+                    hold_store.consume(pending.showtime_id, pending.seats)
+            db.session.commit()
+        except IntegrityError:
+            # Another process won a seat (only possible without BEGIN
+            # IMMEDIATE, i.e. not on SQLite); settle each request on its own.
+            db.session.rollback()
+            for pending in accepted:
+                pending.future.set_result(write_bookings(pending.showtime_id, pending.user, pending.seats))
+            return
+
+        position = 0
+        for pending in accepted:
+            if not hold_store.transactional:
+                hold_store.consume(pending.showtime_id, pending.seats)
+            ids = booking_ids[position:position + len(pending.seats)]
+            position += len(pending.seats)
+            record_bookings(pending.showtime_id, pending.seats, ids, pending.user)
+            pending.future.set_result(BookingResult(booked=list(pending.seats)))
+
+
+def get_booking_writer() -> BookingWriter | None:
+    """Return the app's booking writer, or ``None`` when writes happen inline."""
+    mode = current_app.config.get('BOOKING_WRITER', 'direct')
+    if mode == 'direct':
+        return None
+    if mode != 'queue':
+        raise ValueError(f"Unknown BOOKING_WRITER {mode!r}")
+
+    writer = current_app.extensions.get('booking_writer')
+    if writer is None:
+        writer = current_app.extensions.setdefault('booking_writer', BookingWriter(current_app._get_current_object()))
+    return writer
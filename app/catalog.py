@@ -0,0 +1,72 @@
+"""Catalog version marker.
+
+Pages built only from movies and genres (the index page) can be cached for as
+long as the catalog does not change. The catalog version is a random token in
+``app_meta`` that is replaced whenever a ``Movie`` or ``Genre`` is written:
+
+* ORM writes (admin edits, relationship changes) are caught by an
+  ``after_flush`` hook and bump the version in the same transaction.
+* Bulk Core inserts and schema resets bypass the ORM, so ``app.seeding`` and
+  the reset commands call ``bump_catalog_version`` themselves.
+
+A random token rather than a counter keeps versions unique across resets that
+recreate the ``app_meta`` table.
+"""
+
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models import db, AppMeta, Genre, Movie
+
+CATALOG_VERSION_KEY = 'catalog_version'
+# Returned until the first bump, e.g. right after a reset.
+INITIAL_VERSION = '0'
+
+
+def get_catalog_version() -> str:
+    """Return the current catalog version with a single primary-key lookup."""
+    value = db.session.scalar(select(AppMeta.value).where(AppMeta.key == CATALOG_VERSION_KEY))
+    return value or INITIAL_VERSION
+
+
+def write_meta(connection, key: str, value: str) -> None:
+    """Upsert one ``app_meta`` row on ``connection``; the caller commits."""
+    now = datetime.utcnow()
+    result = connection.execute(
+        update(AppMeta)
+        .where(AppMeta.key == key)
+        .values(value=value, updated_at=now)
+    )
+    if not result.rowcount:
+        connection.execute(
+            insert(AppMeta).values(key=key, value=value, updated_at=now)
+        )
+
+
+def _write_version(connection) -> str:
+    version = uuid.uuid4().hex
+    write_meta(connection, CATALOG_VERSION_KEY, version)
+    return version
+
+
+def bump_catalog_version() -> str:
+    """Replace the catalog version inside the current transaction; the caller commits."""
+    return _write_version(db.session.connection())
+
+
+def _touches_catalog(session: Session) -> bool:
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, (Movie, Genre)):
+            return True
+    return False
+
+
+@event.listens_for(Session, 'after_flush')
+def _bump_on_catalog_write(session: Session, flush_context) -> None:
+    if _touches_catalog(session):
+        _write_version(session.connection())
@@ -0,0 +1,123 @@
+"""Streaming CSV and NDJSON exports of bookings and showtimes.
+
+Exports select plain columns (no ORM objects, no identity map) and read them
+with ``yield_per``, which on PostgreSQL uses a server-side cursor and on
+SQLite steps the cursor lazily. Rows are encoded one partition at a time and
+yielded as text chunks, so memory stays flat however many rows match. The
+same generator backs ``flask export`` and ``GET /api/exports/<kind>``.
+
+``archived=True`` reads ``archived_showtimes``/``archived_bookings`` instead
+of the live tables, for days that ``flask archive-showtimes`` already moved.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Iterator
+
+from sqlalchemy import Select, select
+
+from app.models import db, ArchivedBooking, ArchivedShowtime, Booking, Movie, Showtime
+
+EXPORT_KINDS = ('bookings', 'showtimes')
+EXPORT_FORMATS = ('csv', 'ndjson')
+# Rows fetched and encoded per chunk
+EXPORT_BATCH_SIZE = 1000
+
+MIMETYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def export_query(
+    kind: str,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    movie_id: int | None = None,
+    archived: bool = False,
+) -> Select:
+    """Column-only select for ``kind``, filtered by local show date (inclusive) and movie."""
+    if kind not in EXPORT_KINDS:
+        raise ValueError(f"Unknown export kind {kind!r}")
+    showtime_model = ArchivedShowtime if archived else Showtime
+    booking_model = ArchivedBooking if archived else Booking
+
+    showtime_columns = (
+        showtime_model.movie_id,
+        Movie.title.label('movie_title'),
+        Movie.studio_number,
+        showtime_model.time,
+        showtime_model.local_date,
+    )
+    if kind == 'bookings':
+        statement = (
+            select(
+                booking_model.id,
+                booking_model.showtime_id,
+                *showtime_columns,
+                booking_model.seat,
+                booking_model.user,
+                booking_model.created_at,
+            )
+            .join(showtime_model, booking_model.showtime_id == showtime_model.id)
+            .order_by(booking_model.id)
+        )
+    else:
+        extra = () if archived else (Showtime.is_archived, Showtime.seats_booked)
+        statement = (
+            select(showtime_model.id, *showtime_columns, *extra, showtime_model.created_at)
+            .order_by(showtime_model.id)
+        )
+    statement = statement.join(Movie, showtime_model.movie_id == Movie.id)
+
+    if date_from is not None:
+        statement = statement.where(showtime_model.local_date >= date_from)
+    if date_to is not None:
+        statement = statement.where(showtime_model.local_date <= date_to)
+    if movie_id is not None:
+        statement = statement.where(showtime_model.movie_id == movie_id)
+    return statement
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _encode_csv(columns: list[str], partitions) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(columns)
+    for rows in partitions:
+        writer.writerows([_plain(value) for value in row] for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _encode_ndjson(columns: list[str], partitions) -> Iterator[str]:
+    for rows in partitions:
+        yield ''.join(
+            json.dumps(dict(zip(columns, map(_plain, row))), ensure_ascii=False) + '\n'
+            for row in rows
+        )
+
+
+def stream_export(statement: Select, fmt: str, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+    """Execute ``statement`` lazily and yield it encoded as ``fmt``, one chunk per batch."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}")
+    result = db.session.execute(statement.execution_options(yield_per=batch_size))
+    columns = list(result.keys())
+    encode = _encode_csv if fmt == 'csv' else _encode_ndjson
+    try:
+        yield from encode(columns, result.partitions())
+    finally:
+        result.close()
@@ -0,0 +1,280 @@
+"""Time-limited seat holds.
+
+Selecting a seat in the booking grid places a hold on it for
+``SEAT_HOLD_TTL`` seconds. Other users see the seat as held and cannot pick
+it, so the race for a hot seat is decided by a cheap hold instead of a failed
+``Booking`` insert. Confirming the booking converts the hold; abandoned holds
+simply expire.
+
+Two stores implement the same interface:
+
+* ``MemoryHoldStore`` (default) keeps holds in process memory. It is the
+  cheapest option and correct for a single worker process.
+* ``DatabaseHoldStore`` keeps holds in the ``seat_holds`` table so every
+  worker sees the same holds. Select it with ``SEAT_HOLD_BACKEND=database``.
+
+Expired holds are ignored on read and deleted in bulk by ``sweep``, which the
+stores run at most once every ``SWEEP_INTERVAL_SECONDS``. ``flask sweep-holds``
+runs it on demand.
+"""
+
+from __future__ import annotations
+
+import heapq
+import secrets
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Iterable
+
+from flask import current_app, session
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+
+from app.models import db, SeatHold
+
+DEFAULT_TTL_SECONDS = 120
+SWEEP_INTERVAL_SECONDS = 15
+SESSION_KEY = 'seat_hold_token'
+
+
+class HoldLimitExceeded(ValueError):
+    """Raised when a holder would hold more than ``max_seats`` seats of one showtime."""
+
+
+class MemoryHoldStore:
+    """Process-local hold store with heap-based bulk expiry."""
+
+    # Changes cannot be rolled back with the database transaction
+    transactional = False
+
+    def __init__(self, sweep_interval: float = SWEEP_INTERVAL_SECONDS) -> None:
+        # showtime_id -> seat -> (holder, expires_at)
+        self._holds: dict[int, dict[str, tuple[str, float]]] = {}
+        self._expiry_heap: list[tuple[float, int, str]] = []
+        self._lock = threading.Lock()
+        self._sweep_interval = sweep_interval
+        self._next_sweep = 0.0
+
+    def acquire(
+        self,
+        showtime_id: int,
+        seats: list[str],
+        holder: str,
+        ttl: float,
+        max_seats: int | None = None,
+    ) -> list[str]:
+        """Hold every seat in ``seats`` or none; return the seats held by others.
+
+        With ``max_seats``, raises ``HoldLimitExceeded`` instead when the
+        holder would end up holding more seats of the showtime than that.
+        """
+        now = time.monotonic()
+        self._maybe_sweep(now)
+        expires_at = now + ttl
+
+        with self._lock:
+            holds = self._holds.get(showtime_id, {})
+            conflicts = [
+                seat_id for seat_id in seats
+                if seat_id in holds and holds[seat_id][0] != holder and holds[seat_id][1] > now
+            ]
+            if conflicts:
+                return conflicts
+            if max_seats is not None:
+                mine = {seat_id for seat_id, (owner, expires) in holds.items() if owner == holder and expires > now}
+                _check_limit(mine, seats, max_seats)
+            holds = self._holds.setdefault(showtime_id, holds)
+            for seat_id in seats:
+                holds[seat_id] = (holder, expires_at)
+                heapq.heappush(self._expiry_heap, (expires_at, showtime_id, seat_id))
+        return []
+
+    def release(self, showtime_id: int, seats: Iterable[str], holder: str) -> None:
+        with self._lock:
+            holds = self._holds.get(showtime_id)
+            if not holds:
+                return
+            for seat_id in seats:
+                current = holds.get(seat_id)
+                if current is not None and current[0] == holder:
+                    del holds[seat_id]
+            if not holds:
+                del self._holds[showtime_id]
+
+    def consume(self, showtime_id: int, seats: Iterable[str]) -> None:
+        """Drop the holds on seats that were booked, whoever owns them.
+
+        Call it only once the booking has committed: a failed commit cannot
+        give the holds back.
+        """
+        with self._lock:
+            holds = self._holds.get(showtime_id)
+            if not holds:
+                return
+            for seat_id in seats:
+                holds.pop(seat_id, None)
+            if not holds:
+                del self._holds[showtime_id]
+
+    def held_seats(self, showtime_id: int) -> dict[str, str]:
+        """Return ``{seat: holder}`` for the live holds of a showtime."""
+        now = time.monotonic()
+        with self._lock:
+            holds = self._holds.get(showtime_id, {})
+            return {seat_id: holder for seat_id, (holder, expires_at) in holds.items() if expires_at > now}
+
+    def sweep(self) -> int:
+        """Drop every expired hold in one pass over the expiry heap."""
+        now = time.monotonic()
+        removed = 0
+        with self._lock:
+            heap = self._expiry_heap
+            while heap and heap[0][0] <= now:
+                expires_at, showtime_id, seat_id = heapq.heappop(heap)
+                holds = self._holds.get(showtime_id)
+                # A renewed hold leaves a stale heap entry behind; skip it.
+                if holds and seat_id in holds and holds[seat_id][1] == expires_at:
+                    del holds[seat_id]
+                    removed += 1
+                    if not holds:
+                        del self._holds[showtime_id]
+        return removed
+
+    def _maybe_sweep(self, now: float) -> None:
+        if now >= self._next_sweep:
+            self._next_sweep = now + self._sweep_interval
+            self.sweep()
+
+
+class DatabaseHoldStore:
+    """Hold store backed by the ``seat_holds`` table, shared by all workers."""
+
+    # Changes are part of the caller's transaction
+    transactional = True
+
+    def __init__(self, sweep_interval: float = SWEEP_INTERVAL_SECONDS) -> None:
+        self._sweep_interval = sweep_interval
+        self._next_sweep = 0.0
+
+    def acquire(
+        self,
+        showtime_id: int,
+        seats: list[str],
+        holder: str,
+        ttl: float,
+        max_seats: int | None = None,
+    ) -> list[str]:
+        now = datetime.utcnow()
+        if time.monotonic() >= self._next_sweep:
+            self._next_sweep = time.monotonic() + self._sweep_interval
+            self.sweep()
+
+        existing = db.session.execute(
+            select(SeatHold.seat, SeatHold.holder, SeatHold.expires_at).where(
+                SeatHold.showtime_id == showtime_id,
+                SeatHold.seat.in_(seats),
+            )
+        ).all()
+        conflicts = [seat_id for seat_id, owner, expires_at in existing if owner != holder and expires_at > now]
+        if conflicts:
+            return conflicts
+        if max_seats is not None:
+            mine = set(db.session.scalars(
+                select(SeatHold.seat).where(
+                    SeatHold.showtime_id == showtime_id,
+                    SeatHold.holder == holder,
+                    SeatHold.expires_at > now,
+                )
+            ))
+            _check_limit(mine, seats, max_seats)
+
+        # Replace our own and expired rows for these seats in one transaction.
+        try:
+            if existing:
+                db.session.execute(
+                    delete(SeatHold).where(
+                        SeatHold.showtime_id == showtime_id,
+                        SeatHold.seat.in_([row.seat for row in existing]),
+                    )
+                )
+            expires_at = now + timedelta(seconds=ttl)
+            db.session.add_all([
+                SeatHold(showtime_id=showtime_id, seat=seat_id, holder=holder, expires_at=expires_at)
+                for seat_id in seats
+            ])
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return [seat_id for seat_id, owner in self.held_seats(showtime_id).items()
+                    if seat_id in seats and owner != holder] or list(seats)
+        return []
+
+    def release(self, showtime_id: int, seats: Iterable[str], holder: str) -> None:
+        db.session.execute(
+            delete(SeatHold).where(
+                SeatHold.showtime_id == showtime_id,
+                SeatHold.seat.in_(list(seats)),
+                SeatHold.holder == holder,
+            )
+        )
+        db.session.commit()
+
+    def consume(self, showtime_id: int, seats: Iterable[str]) -> None:
+        """Delete the holds on seats being booked; the caller commits."""
+        db.session.execute(
+            delete(SeatHold).where(
+                SeatHold.showtime_id == showtime_id,
+                SeatHold.seat.in_(list(seats)),
+            )
+        )
+
+    def held_seats(self, showtime_id: int) -> dict[str, str]:
+        rows = db.session.execute(
+            select(SeatHold.seat, SeatHold.holder).where(
+                SeatHold.showtime_id == showtime_id,
+                SeatHold.expires_at > datetime.utcnow(),
+            )
+        )
+        return {seat_id: owner for seat_id, owner in rows}
+
+    def sweep(self) -> int:
+        result = db.session.execute(
+            delete(SeatHold).where(SeatHold.expires_at <= datetime.utcnow())
+        )
+        db.session.commit()
+        return result.rowcount or 0
+
+
+def _check_limit(held: set[str], seats: list[str], max_seats: int) -> None:
+    # Renewing a seat already held does not count twice
+    if len(held.union(seats)) > max_seats:
+        raise HoldLimitExceeded(f'at most {max_seats} seats can be held at once')
+
+
+def get_hold_store() -> MemoryHoldStore | DatabaseHoldStore:
+    """Return the hold store configured for the current app."""
+    store = current_app.extensions.get('seat_holds')
+    if store is None:
+        backend = current_app.config.get('SEAT_HOLD_BACKEND', 'memory')
+        if backend == 'database':
+            store = DatabaseHoldStore()
+        elif backend == 'memory':
+            store = MemoryHoldStore()
+        else:
+            raise ValueError(f"Unknown SEAT_HOLD_BACKEND {backend!r}")
+        current_app.extensions['seat_holds'] = store
+    return store
+
+
+def hold_ttl() -> float:
+    return float(current_app.config.get('SEAT_HOLD_TTL', DEFAULT_TTL_SECONDS))
+
+
+def holder_token(create: bool = False) -> str | None:
+    """Return the hold token stored in the visitor's session."""
+    token = session.get(SESSION_KEY)
+    if token is None and create:
+        token = secrets.token_urlsafe(16)
+        session[SESSION_KEY] = token
+    return token
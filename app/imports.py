@@ -0,0 +1,166 @@
+"""Bulk import of box-office and partner sales into ``bookings``.
+
+Sales arrive as CSV files with ``showtime_id,seat,user`` columns. The file is
+read as a stream; every row is checked in memory against the live showtime ids
+and their studio layouts (loaded once), against the ``Booking.user`` column
+length, and against rows seen earlier in the same file, so the database never
+has to truncate or reject a row halfway through a batch. Valid rows are written ``batch_size`` at a time with ``INSERT ... ON
+CONFLICT (showtime_id, seat) DO NOTHING``, so a seat that was already sold on
+the web is skipped by the database instead of aborting the batch with an
+``IntegrityError``. The statement returns the rows it inserted; everything
+else in the batch is reported as already booked.
+
+Each batch is one transaction that also bumps ``Showtime.seats_booked``.
+Rejected rows are written to a side file with a ``reason`` column so they can
+be fixed and imported again.
+"""
+
+from __future__ import annotations
+
+import csv
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import IO, Iterator
+
+from sqlalchemy import select
+
+from app.layouts import SeatLayout, layout_for_studio
+from app.models import db, Booking, Movie, Showtime
+from app.seat_counts import add_seats_booked, lock_showtimes
+
+IMPORT_COLUMNS = ('showtime_id', 'seat', 'user')
+IMPORT_BATCH_SIZE = 5000
+# Longest user name the bookings table stores
+MAX_USER_LENGTH = Booking.__table__.c.user.type.length
+
+
+@dataclass
+class ImportReport:
+    rows: int = 0
+    inserted: int = 0
+    rejected: int = 0
+    batches: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+
+def _insert_ignoring_conflicts(dialect_name: str):
+    """``INSERT ... ON CONFLICT (showtime_id, seat) DO NOTHING`` for the current database."""
+    if dialect_name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect_name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise ValueError(f"Import needs SQLite or PostgreSQL (INSERT ... ON CONFLICT), not {dialect_name}")
+    return (
+        insert(Booking)
+        .on_conflict_do_nothing(index_elements=['showtime_id', 'seat'])
+        .returning(Booking.showtime_id, Booking.seat)
+    )
+
+
+def _showtime_layouts() -> tuple[dict[int, SeatLayout], set[int]]:
+    """Layouts of every showtime, and the ids of those flagged ``is_archived``."""
+    rows = db.session.execute(
+        select(Showtime.id, Movie.studio_number, Showtime.is_archived)
+        .join(Movie, Showtime.movie_id == Movie.id)
+    )
+    layouts: dict[int, SeatLayout] = {}
+    archived: set[int] = set()
+    for showtime_id, studio_number, is_archived in rows:
+        layouts[showtime_id] = layout_for_studio(studio_number)
+        if is_archived:
+            archived.add(showtime_id)
+    return layouts, archived
+
+
+def _validated(
+    reader: csv.DictReader,
+    layouts: dict[int, SeatLayout],
+    archived: set[int],
+    reject,
+) -> Iterator[tuple[dict, dict]]:
+    """Yield ``(booking values, original row)`` for rows that pass the in-memory checks."""
+    seen: set[tuple[int, str]] = set()
+    for row in reader:
+        try:
+            showtime_id = int(row.get('showtime_id') or '')
+        except ValueError:
+            reject(row, 'invalid showtime_id')
+            continue
+        seat = (row.get('seat') or '').strip().upper()
+        user = (row.get('user') or '').strip()
+
+        layout = layouts.get(showtime_id)
+        if layout is None:
+            reject(row, 'unknown showtime')
+        elif showtime_id in archived:
+            reject(row, 'archived showtime')
+        elif seat not in layout.seat_set:
+            reject(row, 'unknown seat')
+        elif not user:
+            reject(row, 'missing user')
+        elif len(user) > MAX_USER_LENGTH:
+            reject(row, f'user longer than {MAX_USER_LENGTH} characters')
+        elif (showtime_id, seat) in seen:
+            reject(row, 'duplicate in file')
+        else:
+            seen.add((showtime_id, seat))
+            yield {'showtime_id': showtime_id, 'seat': seat, 'user': user}, row
+
+
+def import_bookings(
+    source: IO[str],
+    rejects: IO[str],
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> ImportReport:
+    """Import the bookings CSV ``source``; write rejected rows to ``rejects``."""
+    report = ImportReport()
+    started = time.perf_counter()
+
+    reader = csv.DictReader(source)
+    missing = [column for column in IMPORT_COLUMNS if column not in (reader.fieldnames or ())]
+    if missing:
+        raise ValueError(f"Import file is missing columns: {', '.join(missing)}")
+    rejects_writer = csv.DictWriter(rejects, [*reader.fieldnames, 'reason'], extrasaction='ignore')
+    rejects_writer.writeheader()
+
+    def reject(row: dict, reason: str) -> None:
+        report.rejected += 1
+        rejects_writer.writerow({**row, 'reason': reason})
+
+    statement = _insert_ignoring_conflicts(db.engine.dialect.name)
+    layouts, archived = _showtime_layouts()
+
+    batch: list[dict] = []
+    originals: list[dict] = []
+
+    def flush() -> None:
+        # Row locks before ids, as on the booking paths (a no-op on SQLite)
+        lock_showtimes(values['showtime_id'] for values in batch)
+        inserted = set(db.session.execute(statement, batch).tuples())
+        add_seats_booked(Counter(showtime_id for showtime_id, _ in inserted))
+        db.session.commit()
+        for values, row in zip(batch, originals):
+            if (values['showtime_id'], values['seat']) not in inserted:
+                reject(row, 'seat already booked')
+        report.inserted += len(inserted)
+        report.batches += 1
+        batch.clear()
+        originals.clear()
+
+    for values, row in _validated(reader, layouts, archived, reject):
+        batch.append(values)
+        originals.append(row)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    report.rows = report.inserted + report.rejected
+    report.elapsed = time.perf_counter() - started
+    return report
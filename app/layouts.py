@@ -1,14 +1,24 @@
-"""Seat layout definitions for auditorium seating maps."""
+"""Seat layout definitions for auditorium seating maps.
+
+Raw maps are compiled once at import into immutable ``SeatLayout`` objects.
+A layout gives every seat a stable index (row-major order) that availability
+bitmaps key on, so seat validation and lookups are constant time.
+``layout_for_studio`` picks the layout for a studio; studios without an entry
+in ``STUDIO_LAYOUTS`` use the standard layout.
+"""
 
 from __future__ import annotations
 
+from types import MappingProxyType
+from typing import Mapping
+
 # Seat map uses strings for seats (e.g., "A1") and None for aisles/walkways.
 # Each inner list represents a row in the auditorium. Columns align across rows
 # so CSS grid can render the layout faithfully.
 
 SEAT_MAP: list[list[str | None]] = [
     # A
-    ["A1","A2","A3","A4","A5","A6","A7","A8","A9",None,"A10","A11","A12","A13","A14","A15","A16","A17","B18"],
+    ["A1","A2","A3","A4","A5","A6","A7","A8","A9",None,"A10","A11","A12","A13","A14","A15","A16","A17","A18"],
     # B
     ["B1","B2","B3","B4","B5","B6","B7","B8","B9",None,"B10","B11","B12","B13","B14","B15","B16","B17","B18"],
     # C
@@ -36,6 +46,70 @@ SEAT_MAP: list[list[str | None]] = [
 ]
 
 
+class SeatLayout:
+    """Compiled, read-only view of a seat map."""
+
+    __slots__ = ('name', 'grid', 'seats', 'index', 'coordinates', 'seat_set', 'capacity', 'columns')
+
+    name: str
+    grid: tuple[tuple[str | None, ...], ...]
+    seats: tuple[str, ...]
+    index: Mapping[str, int]
+    coordinates: Mapping[str, tuple[int, int]]
+    seat_set: frozenset[str]
+    capacity: int
+    columns: int
+
+    def __init__(self, name: str, seat_map: list[list[str | None]]) -> None:
+        grid = tuple(tuple(row) for row in seat_map)
+        columns = len(grid[0]) if grid else 0
+        seats: list[str] = []
+        coordinates: dict[str, tuple[int, int]] = {}
+
+        for row_number, row in enumerate(grid):
+            if len(row) != columns:
+                raise ValueError(f"Layout {name!r}: row {row_number} has {len(row)} columns, expected {columns}")
+            for column_number, seat_id in enumerate(row):
+                if seat_id is None:
+                    continue
+                if seat_id in coordinates:
+                    raise ValueError(f"Layout {name!r}: seat {seat_id!r} appears more than once")
+                coordinates[seat_id] = (row_number, column_number)
+                seats.append(seat_id)
+
+        values = {
+            'name': name,
+            'grid': grid,
+            'seats': tuple(seats),
+            'index': MappingProxyType({seat_id: i for i, seat_id in enumerate(seats)}),
+            'coordinates': MappingProxyType(coordinates),
+            'seat_set': frozenset(seats),
+            'capacity': len(seats),
+            'columns': columns,
+        }
+        for attr, value in values.items():
+            object.__setattr__(self, attr, value)
+
+    def __setattr__(self, attr, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __contains__(self, seat_id: object) -> bool:
+        return seat_id in self.seat_set
+
+    def __repr__(self) -> str:
+        return f'<SeatLayout {self.name} capacity={self.capacity}>'
+
+
+LAYOUTS: dict[str, SeatLayout] = {
+    'standard': SeatLayout('standard', SEAT_MAP),
+}
+
+DEFAULT_LAYOUT = LAYOUTS['standard']
 
+# studio_number -> layout name, for studios that do not use the standard hall
+STUDIO_LAYOUTS: dict[int, str] = {}
 
 
+def layout_for_studio(studio_number: int | None) -> SeatLayout:
+    """Return the compiled layout of a studio."""
+    return LAYOUTS[STUDIO_LAYOUTS.get(studio_number, DEFAULT_LAYOUT.name)]
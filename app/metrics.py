@@ -0,0 +1,223 @@
+"""Request, SQL and booking metrics in Prometheus text format.
+
+Flask request hooks time every request per endpoint, and SQLAlchemy engine
+events count statements and statement time for the request running on the
+same thread. Booking conflicts are counted where ``app.booking`` detects
+them, and pool gauges are read when ``/metrics`` is scraped.
+
+The registry is process-local: with several workers each one reports its own
+numbers. Recording is a handful of dict updates per request and two
+``perf_counter`` calls per statement, cheap enough to leave on permanently.
+
+The numbers reveal traffic and booking volumes, so ``/metrics`` requires
+``Authorization: Bearer <METRICS_TOKEN>`` and answers 404 while no token is
+configured. ``METRICS_ENABLED`` defaults to on only when a token is set.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Flask, Response, abort, current_app, g, request
+from sqlalchemy import event
+
+from app.tokens import bearer_token_matches
+
+# Statements run outside a request (writer thread, CLI jobs)
+BACKGROUND = '(background)'
+# Requests that matched no route; keeps label cardinality bounded
+UNMATCHED = '(unmatched)'
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def render(self) -> list[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            items = sorted(self._values.items())
+        lines.extend(f'{self.name}{_labels(self.labels, key)} {_number(value)}' for key, value in items)
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = (), buckets=LATENCY_BUCKETS) -> None:
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._series: dict[tuple[str, ...], list[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> list[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        for key, series in items:
+            cumulative = 0
+            for bound, hits in zip((*self.buckets, '+Inf'), series):
+                cumulative += hits
+                le = f'le="{bound}"'
+                lines.append(f'{self.name}_bucket{_labels(self.labels, key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labels, key)} {_number(series[-1])}')
+            lines.append(f'{self.name}_count{_labels(self.labels, key)} {cumulative}')
+        return lines
+
+
+REQUEST_LATENCY = Histogram(
+    'tiketa_http_request_duration_seconds', 'Request latency by endpoint.', ('endpoint',),
+)
+REQUESTS = Counter(
+    'tiketa_http_requests_total', 'Requests by endpoint, method and status.', ('endpoint', 'method', 'status'),
+)
+SQL_STATEMENTS = Counter(
+    'tiketa_sql_statements_total', 'SQL statements executed, by endpoint.', ('endpoint',),
+)
+SQL_SECONDS = Counter(
+    'tiketa_sql_duration_seconds_total', 'Time spent executing SQL, by endpoint.', ('endpoint',),
+)
+BOOKING_CONFLICTS = Counter(
+    'tiketa_booking_conflicts_total',
+    'Bookings rejected because a seat was taken: precheck (bitmap or hold), batch (writer queue) '
+    'or constraint (IntegrityError on insert).',
+    ('stage',),
+)
+
+_local = threading.local()
+
+
+def count_booking_conflict(stage: str) -> None:
+    BOOKING_CONFLICTS.inc(stage)
+
+
+def _current_endpoint() -> str:
+    return getattr(_local, 'endpoint', None) or BACKGROUND
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    # A connection runs one statement at a time, so one slot is enough
+    conn.info['metrics_started'] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = conn.info.pop('metrics_started', None)
+    if started is None:
+        return
+    endpoint = _current_endpoint()
+    SQL_STATEMENTS.inc(endpoint)
+    SQL_SECONDS.inc(endpoint, amount=time.perf_counter() - started)
+
+
+def _before_request() -> None:
+    g.metrics_started = time.perf_counter()
+    _local.endpoint = request.endpoint or UNMATCHED
+
+
+def _after_request(response):
+    REQUESTS.inc(request.endpoint or UNMATCHED, request.method, str(response.status_code))
+    return response
+
+
+def _teardown_request(exc) -> None:
+    started = g.pop('metrics_started', None)
+    if started is not None:
+        REQUEST_LATENCY.observe(time.perf_counter() - started, request.endpoint or UNMATCHED)
+    _local.endpoint = None
+
+
+def _pool_gauges(engine) -> list[str]:
+    pool = engine.pool
+    lines = []
+    for name, attribute, help_text in (
+        ('tiketa_db_pool_size', 'size', 'Configured connection pool size.'),
+        ('tiketa_db_pool_checked_out', 'checkedout', 'Connections currently checked out.'),
+        ('tiketa_db_pool_checked_in', 'checkedin', 'Idle connections in the pool.'),
+        ('tiketa_db_pool_overflow', 'overflow', 'Connections opened beyond the pool size.'),
+    ):
+        reader = getattr(pool, attribute, None)
+        if reader is None:
+            continue
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} gauge', f'{name} {reader()}']
+    return lines
+
+
+def render_metrics(engine=None) -> str:
+    lines = []
+    for metric in (REQUEST_LATENCY, REQUESTS, SQL_STATEMENTS, SQL_SECONDS, BOOKING_CONFLICTS):
+        lines += metric.render()
+    if engine is not None:
+        lines += _pool_gauges(engine)
+    return '\n'.join(lines) + '\n'
+
+
+def init_metrics(app: Flask) -> None:
+    """Install the request hooks, engine listeners and the ``/metrics`` route."""
+    from app.models import db
+
+    with app.app_context():
+        engine = db.engine
+        engines = list(db.engines.values())
+    # Every bind, so reads routed to a replica are counted too
+    for bind in engines:
+        if not event.contains(bind, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(bind, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(bind, 'after_cursor_execute', _after_cursor_execute)
+
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+
+    def metrics():
+        token = current_app.config.get('METRICS_TOKEN')
+        if not token:
+            abort(404)
+        if not bearer_token_matches(token):
+            response = Response('invalid or missing metrics token\n', 401, mimetype='text/plain')
+            response.headers['WWW-Authenticate'] = 'Bearer'
+            return response
+        response = Response(render_metrics(engine), mimetype='text/plain; version=0.0.4')
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+
+    app.add_url_rule('/metrics', 'metrics', metrics)
@@ -1,7 +1,11 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+from sqlalchemy import event
 
-db = SQLAlchemy()
+from app.replicas import RoutingSession
+
+# RoutingSession only differs from the default when a read replica is configured
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 movie_genres = db.Table(
     'movie_genres',
@@ -31,11 +35,13 @@ class Movie(db.Model):
         order_by='Showtime.time'
     )
 
+    # Loaded per query: the listing uses selectinload for one page of
+    # movies, single-movie pages load them lazily when rendered
     genres = db.relationship(
         'Genre',
         secondary=movie_genres,
         back_populates='movies',
-        lazy='joined'
+        lazy='select'
     )
     
     def __repr__(self):
@@ -58,26 +64,68 @@ class Genre(db.Model):
     def __repr__(self):
         return f'<Genre {self.name}>'
 
+def _local_date_default(context):
+    from app.timezones import local_date
+    return local_date(context.get_current_parameters()['time'])
+
+
 class Showtime(db.Model):
     __tablename__ = 'showtimes'
+
+    __table_args__ = (
+        # movie_detail: movie_id = ? AND is_archived AND time range, ordered by time
+        db.Index('ix_showtimes_movie_archived_time', 'movie_id', 'is_archived', 'time'),
+        # Per-day lookups and grouping by local calendar date
+        db.Index('ix_showtimes_local_date_movie', 'local_date', 'movie_id'),
+        # Never reuse ids: archived rows keep theirs (app.archive)
+        {'sqlite_autoincrement': True},
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     movie_id = db.Column(db.Integer, db.ForeignKey('movies.id'), nullable=False)
     time = db.Column(db.DateTime, nullable=False)
+    # Jakarta date of ``time``, filled on insert and kept in step when an
+    # ORM flush changes ``time``. Nullable only so `flask upgrade-db` can add
+    # it to existing tables before backfilling.
+    local_date = db.Column(db.Date, nullable=True, default=_local_date_default)
     is_archived = db.Column(db.Boolean, nullable=False, default=False)
+    # Booked seats, kept in step by the booking paths (app.seat_counts).
+    # Nullable for the same upgrade-db reason as local_date.
+    seats_booked = db.Column(db.Integer, nullable=True, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationship with bookings
     bookings = db.relationship('Booking', backref='showtime', lazy=True)
     
     def __repr__(self):
-        return f'<Showtime {self.movie.title} at {self.time}>'
+        return f'<Showtime movie={self.movie_id} at {self.time}>'
+
+
+@event.listens_for(Showtime, 'before_update')
+def _refresh_local_date(mapper, connection, showtime):
+    # A column onupdate would also fire for updates that leave ``time`` alone
+    if db.inspect(showtime).attrs.time.history.has_changes():
+        from app.timezones import local_date
+        showtime.local_date = local_date(showtime.time)
+
+# Partial index over live rows only: purge_past_showtimes and the scheduler
+# scan by time with is_archived = false. Built after the class so the WHERE
+# clause matches the ``Showtime.is_archived.is_(False)`` filter used in queries.
+db.Index(
+    'ix_showtimes_live_time',
+    Showtime.time,
+    sqlite_where=Showtime.is_archived.is_(False),
+    postgresql_where=Showtime.is_archived.is_(False),
+)
 
 class Booking(db.Model):
     __tablename__ = 'bookings'
 
     __table_args__ = (
         db.UniqueConstraint('showtime_id', 'seat', name='uq_booking_showtime_seat'),
+        # Never reuse ids: archived rows keep theirs, and seat-state deltas
+        # are keyed by booking id (app.availability)
+        {'sqlite_autoincrement': True},
     )
     
     id = db.Column(db.Integer, primary_key=True)
@@ -87,4 +135,62 @@ class Booking(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     def __repr__(self):
-        return f'<Booking {self.user} - Seat {self.seat}>'
\ No newline at end of file
+        return f'<Booking {self.user} - Seat {self.seat}>'
+
+class ArchivedShowtime(db.Model):
+    """Past showtime moved out of ``showtimes`` by ``app.archive``; keeps its original id."""
+    __tablename__ = 'archived_showtimes'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    movie_id = db.Column(db.Integer, db.ForeignKey('movies.id'), nullable=False, index=True)
+    time = db.Column(db.DateTime, nullable=False)
+    local_date = db.Column(db.Date, nullable=True)
+    created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ArchivedShowtime {self.id} at {self.time}>'
+
+class ArchivedBooking(db.Model):
+    """Booking of an archived showtime; keeps its original id."""
+    __tablename__ = 'archived_bookings'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user = db.Column(db.String(255), nullable=False)
+    seat = db.Column(db.String(10), nullable=False)
+    showtime_id = db.Column(db.Integer, db.ForeignKey('archived_showtimes.id'), nullable=False, index=True)
+    created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ArchivedBooking {self.user} - Seat {self.seat}>'
+
+class SeatHold(db.Model):
+    """Short-lived claim on a seat while a user finishes the booking form."""
+    __tablename__ = 'seat_holds'
+
+    __table_args__ = (
+        db.UniqueConstraint('showtime_id', 'seat', name='uq_seat_hold_showtime_seat'),
+        db.Index('ix_seat_holds_expires_at', 'expires_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    showtime_id = db.Column(db.Integer, db.ForeignKey('showtimes.id'), nullable=False)
+    seat = db.Column(db.String(10), nullable=False)
+    holder = db.Column(db.String(64), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f'<SeatHold {self.seat} by {self.holder} until {self.expires_at}>'
+
+
+class AppMeta(db.Model):
+    """Small key/value store for application-wide markers such as the catalog version."""
+    __tablename__ = 'app_meta'
+
+    key = db.Column(db.String(64), primary_key=True)
+    value = db.Column(db.String(255), nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<AppMeta {self.key}={self.value}>'
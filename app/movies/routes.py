@@ -1,41 +1,131 @@
+from bisect import bisect_left, bisect_right
 from collections import defaultdict, OrderedDict
 from datetime import datetime, time, timedelta
+from typing import NamedTuple
 
-from flask import render_template, request, flash, redirect, url_for
+from flask import current_app, render_template, request, flash, redirect, url_for, jsonify
+from sqlalchemy.orm import joinedload, selectinload
 from app.movies import bp
-from app.models import db, Movie, Showtime, Booking
-from app.layouts import SEAT_MAP
-from sqlalchemy.exc import IntegrityError
-import pytz
+from app.models import db, Movie, Showtime
 
-JAKARTA_TZ = pytz.timezone('Asia/Jakarta')
-UTC = pytz.UTC
+# Helpers are imported inside the views that use them, so registering the
+# blueprint at boot loads only Flask and the models.
 
+# Largest group the best-available allocator will look for
+MAX_GROUP_SIZE = 10
+# Movies per listing page unless CATALOG_PAGE_SIZE says otherwise
+CATALOG_PAGE_SIZE = 24
+# Seconds a client is asked to wait before retrying when the booking queue is busy
+BOOKING_RETRY_AFTER = 2
 
-def _utc_naive(dt: datetime) -> datetime:
-    return dt.astimezone(UTC).replace(tzinfo=None)
+class MoviePage(NamedTuple):
+    movies: list[Movie]
+    # Keyset cursors (studio numbers) for the neighbouring pages, or None
+    next_after: int | None
+    prev_before: int | None
 
 
-def _to_local(dt_utc_naive: datetime) -> datetime:
-    return UTC.localize(dt_utc_naive).astimezone(JAKARTA_TZ)
+def _keyset_ids(movie_ids, studio_of, after, before, size):
+    """Slice ids already in studio order the same way the SQL keyset does."""
+    if after is not None:
+        start = bisect_right([studio_of[movie_id] for movie_id in movie_ids], after)
+    elif before is not None:
+        start = max(bisect_left([studio_of[movie_id] for movie_id in movie_ids], before) - size, 0)
+    else:
+        start = 0
+    return movie_ids[start:start + size], start > 0, start + size < len(movie_ids)
+
+
+def movie_page(after=None, before=None, size=CATALOG_PAGE_SIZE, movie_ids=None, studio_of=None):
+    """One page of movies in studio order, keyset-paginated on ``studio_number``.
+
+    Without ``movie_ids`` the page is read with ``studio_number > after`` (or
+    ``< before``) and a ``LIMIT``; with them (search results, already in studio
+    order) the page is cut in memory. Either way genres are loaded with one
+    ``selectin`` query for just the movies on the page.
+    """
+    if movie_ids is not None:
+        page_ids, has_prev, has_next = _keyset_ids(movie_ids, studio_of, after, before, size)
+        movies = (
+            Movie.query.options(selectinload(Movie.genres))
+            .filter(Movie.id.in_(page_ids))
+            .order_by(Movie.studio_number)
+            .all()
+        ) if page_ids else []
+    else:
+        listing = Movie.query.options(selectinload(Movie.genres))
+        if before is not None:
+            listing = listing.filter(Movie.studio_number < before).order_by(Movie.studio_number.desc())
+        else:
+            if after is not None:
+                listing = listing.filter(Movie.studio_number > after)
+            listing = listing.order_by(Movie.studio_number)
+        movies = listing.limit(size + 1).all()
+        more = len(movies) > size
+        movies = movies[:size]
+        if before is not None:
+            movies.reverse()
+            has_prev, has_next = more, True
+        else:
+            has_prev, has_next = after is not None, more
+
+    return MoviePage(
+        movies,
+        movies[-1].studio_number if has_next and movies else None,
+        movies[0].studio_number if has_prev and movies else None,
+    )
+
 
 @bp.route('/')
 def index():
-    """Main route to list all movies, ordered by studio."""
-    movies = Movie.query.order_by(Movie.studio_number).all()
-    return render_template('movies/index.html', movies=movies)
+    """Main route to list movies, ordered by studio, one keyset page at a time.
+
+    ``?q=`` filters by title words (prefixes) and each ``?genre=`` narrows
+    the list further, both answered by the in-memory search index.
+    ``?after=``/``?before=`` carry the studio number of the page edge.
+    """
+    from app.page_cache import catalog_page
+    from app.search import get_search_index
+
+    query = request.args.get('q', '').strip()
+    genres = sorted({name.strip() for name in request.args.getlist('genre') if name.strip()})
+    after = request.args.get('after', type=int)
+    before = request.args.get('before', type=int) if after is None else None
+    size = current_app.config['CATALOG_PAGE_SIZE']
+
+    def render():
+        search_index = get_search_index()
+        if query or genres:
+            page = movie_page(
+                after, before, size,
+                movie_ids=search_index.search(query, genres), studio_of=search_index.studio_of,
+            )
+        else:
+            page = movie_page(after, before, size)
+        return render_template(
+            'movies/index.html',
+            movies=page.movies,
+            page=page,
+            query=query,
+            selected_genres=genres,
+            genre_choices=search_index.genre_choices(),
+        )
+
+    # The listing only depends on the catalog, so it is cached per catalog version
+    return catalog_page(('movies.index', query, tuple(genres), after, before, size), render)
 
 @bp.route('/movie/<int:movie_id>')
 def movie_detail(movie_id):
     """Show movie details and showtimes"""
-    movie = Movie.query.get_or_404(movie_id)
+    from app.layouts import layout_for_studio
+    from app.seat_counts import seats_left
+    from app.timezones import local_date, localize_showtimes, to_utc_naive
 
-    now_local = datetime.now(JAKARTA_TZ)
-    horizon_local = datetime.combine(now_local.date() + timedelta(days=2), time.max)
-    horizon_local = JAKARTA_TZ.localize(horizon_local)
+    # One movie with a handful of genres: joining them costs nothing here
+    movie = Movie.query.options(joinedload(Movie.genres)).get_or_404(movie_id)
 
-    start_utc = _utc_naive(now_local)
-    end_utc = _utc_naive(horizon_local)
+    start_utc = datetime.utcnow()
+    end_utc = to_utc_naive(datetime.combine(local_date(start_utc) + timedelta(days=2), time.max))
 
     upcoming_showtimes = (
         Showtime.query
@@ -50,80 +140,194 @@ def movie_detail(movie_id):
     )
 
     grouped = defaultdict(list)
-    for showtime in upcoming_showtimes:
-        local_start = _to_local(showtime.time)
-        showtime.local_start = local_start
-        showtime.local_end = local_start + timedelta(hours=2)
-        grouped[local_start.date()].append(showtime)
+    for showtime in localize_showtimes(upcoming_showtimes):
+        grouped[showtime.local_date].append(showtime)
 
     grouped_showtimes = OrderedDict(
         sorted(grouped.items(), key=lambda item: item[0])
     )
 
+    # Seats left come from the materialised counters: no per-showtime COUNT(*)
+    capacity = layout_for_studio(movie.studio_number).capacity
+
     return render_template(
         'movies/detail.html',
         movie=movie,
         grouped_showtimes=grouped_showtimes,
+        capacity=capacity,
+        seats_left=seats_left,
         timedelta=timedelta
     )
 
 @bp.route('/book/<int:showtime_id>', methods=['GET', 'POST'])
 def book_ticket(showtime_id):
     """Book a ticket for a showtime"""
-    showtime = Showtime.query.get_or_404(showtime_id)
-    local_start = _to_local(showtime.time)
-    showtime.local_start = local_start
-    showtime.local_end = local_start + timedelta(hours=2)
+    from app.availability import get_availability, layout_for_showtime
+    from app.booking import book_seats, parse_seats
+    from app.holds import get_hold_store, hold_ttl, holder_token
+    from app.seat_grid import render_seat_grid
+    from app.timezones import localize_showtimes
+
+    # The movie comes in the same SELECT; its genres load only if the page renders
+    showtime = Showtime.query.options(joinedload(Showtime.movie)).get_or_404(showtime_id)
+    localize_showtimes([showtime])
+    # The page needs the movie anyway; resolving the layout from it is free
+    layout_for_showtime(showtime_id, showtime.movie.studio_number)
     
+    if request.method == 'POST' and request.is_json:
+        return _book_json(showtime_id)
+
     if request.method == 'POST':
         user = request.form.get('user')
-        seat = request.form.get('seat')
-
-        if user and seat:
-            booking = Booking(
-                user=user,
-                seat=seat,
-                showtime_id=showtime_id
-            )
-            db.session.add(booking)
+        seats = parse_seats(request.form.getlist('seat'))
 
+        if user and seats:
             try:
-                db.session.commit()
-                flash(f'Berhasil booking seat {seat} untuk {user}!', 'success')
-                return redirect(url_for('movies.book_ticket', showtime_id=showtime_id))
-
-            except IntegrityError:
-                db.session.rollback()
-                flash(
-                    f'Maaf, kursi {seat} baru saja diambil orang lain. Silakan pilih lagi.',
-                    'error'
-                )
-
+                result = book_seats(showtime_id, user, seats, holder=holder_token())
             except Exception as exc:
                 db.session.rollback()
                 flash(f'Terjadi error tidak terduga: {exc}', 'error')
+            else:
+                if result.ok:
+                    flash(f'Berhasil booking seat {", ".join(result.booked)} untuk {user}!', 'success')
+                    return redirect(url_for('movies.book_ticket', showtime_id=showtime_id))
+                if result.invalid:
+                    flash(f'Kursi {", ".join(result.invalid)} tidak ada di studio ini.', 'error')
+                else:
+                    flash(
+                        f'Maaf, kursi {", ".join(result.conflicts)} baru saja diambil orang lain. '
+                        'Silakan pilih lagi.',
+                        'error'
+                    )
         else:
             flash('Silakan provide nama pemesan dan no seat.', 'error')
 
-    # Gather booking details for the seating chart
-    bookings = (
-        Booking.query
-        .filter_by(showtime_id=showtime_id)
-        .order_by(Booking.seat)
-        .all()
-    )
-    booked_seats = {
-        booking.seat: {
-            "user": booking.user,
-            "booked_at": booking.created_at
-        }
-        for booking in bookings
-    }
+    # Seat chart state comes from the cached bitmap, not the bookings table
+    availability = get_availability(showtime_id)
+    holder = holder_token()
+    held_seats = get_hold_store().held_seats(showtime_id)
+    held_by_others = {seat_id for seat_id, owner in held_seats.items() if owner != holder}
+    held_by_me = [seat_id for seat_id, owner in held_seats.items() if owner == holder]
 
     return render_template(
         'movies/book.html',
         showtime=showtime,
-        booked_seats=booked_seats,
-        seat_map=SEAT_MAP,
+        availability=availability,
+        held_by_me=held_by_me,
+        hold_ttl=int(hold_ttl()),
+        seat_grid=render_seat_grid(
+            availability.layout, availability.bits, held_by_others, set(held_by_me), availability.users
+        ),
         timedelta=timedelta
-    )
\ No newline at end of file
+    )
+
+
+def _book_json(showtime_id):
+    """JSON variant of the booking form: ``{"user": ..., "seats": [...]}``."""
+    from app.booking import BookingUnavailable, book_best_available, book_seats, parse_seats
+    from app.holds import holder_token
+
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify(error='request body must be a JSON object'), 400
+    user = payload.get('user')
+    seats = parse_seats(payload.get('seats', payload.get('seat')))
+    count = payload.get('count')
+
+    if not isinstance(user, str) or not user.strip():
+        return jsonify(error='user is required'), 400
+
+    if not seats and not (isinstance(count, int) and 0 < count <= MAX_GROUP_SIZE):
+        return jsonify(error=f'seats or a count between 1 and {MAX_GROUP_SIZE} is required'), 400
+
+    try:
+        if seats:
+            result = book_seats(showtime_id, user.strip(), seats, holder=holder_token())
+        else:
+            # Auto-assign the best block of adjacent seats
+            result = book_best_available(showtime_id, user.strip(), count, holder=holder_token())
+    except BookingUnavailable:
+        # Nothing was written; the client may simply try again
+        response = jsonify(error='booking is temporarily unavailable, try again')
+        response.headers['Retry-After'] = str(BOOKING_RETRY_AFTER)
+        return response, 503
+
+    if not seats and not result.ok and not result.conflicts:
+        return jsonify(error=f'no block of {count} adjacent seats is free'), 409
+
+    if result.ok:
+        return jsonify(showtime_id=showtime_id, user=user.strip(), booked=result.booked), 201
+    if result.invalid:
+        return jsonify(error='unknown seats', invalid=result.invalid), 400
+    return jsonify(error='seats already taken', conflicts=result.conflicts), 409
+
+
+
+@bp.route('/book/<int:showtime_id>/hold', methods=['POST', 'DELETE'])
+def hold_seats(showtime_id):
+    """Place (POST) or release (DELETE) short-lived holds on seats."""
+    from app.availability import get_availability, layout_for_showtime
+    from app.booking import parse_seats
+    from app.holds import HoldLimitExceeded, get_hold_store, hold_ttl, holder_token
+
+    Showtime.query.get_or_404(showtime_id)
+    payload = request.get_json(silent=True)
+    if payload is None:
+        payload = {}
+    elif not isinstance(payload, dict):
+        return jsonify(error='request body must be a JSON object'), 400
+    seats = parse_seats(payload.get('seats', payload.get('seat')) or request.form.getlist('seat'))
+    if not seats:
+        return jsonify(error='seats are required'), 400
+
+    store = get_hold_store()
+    if request.method == 'DELETE':
+        token = holder_token()
+        if token:
+            store.release(showtime_id, seats, token)
+        return jsonify(released=seats)
+
+    layout = layout_for_showtime(showtime_id)
+    invalid = [seat_id for seat_id in seats if seat_id not in layout]
+    if invalid:
+        return jsonify(error='unknown seats', invalid=invalid), 400
+
+    availability = get_availability(showtime_id)
+    taken = [seat_id for seat_id in seats if seat_id in availability]
+    if taken:
+        return jsonify(error='seats already taken', conflicts=taken), 409
+
+    ttl = hold_ttl()
+    try:
+        # One visitor may hold at most a group's worth of seats per showtime
+        conflicts = store.acquire(showtime_id, seats, holder_token(create=True), ttl, max_seats=MAX_GROUP_SIZE)
+    except HoldLimitExceeded as exc:
+        return jsonify(error=str(exc), limit=MAX_GROUP_SIZE), 409
+    if conflicts:
+        return jsonify(error='seats are held by someone else', conflicts=conflicts), 409
+    return jsonify(held=seats, expires_in=int(ttl))
+
+
+@bp.route('/book/<int:showtime_id>/best')
+def best_seats(showtime_id):
+    """Suggest the best blocks of ``count`` adjacent free seats."""
+    from app.allocator import best_available
+    from app.availability import layout_for_showtime
+    from app.booking import occupied_bits
+    from app.holds import holder_token
+
+    Showtime.query.get_or_404(showtime_id)
+    count = request.args.get('count', default=2, type=int)
+    limit = request.args.get('limit', default=3, type=int)
+    if not 0 < count <= MAX_GROUP_SIZE or not 0 < limit <= 10:
+        return jsonify(error=f'count must be 1-{MAX_GROUP_SIZE} and limit 1-10'), 400
+
+    layout = layout_for_showtime(showtime_id)
+    blocks = best_available(layout, occupied_bits(showtime_id, holder_token()), count, limit)
+    response = jsonify(
+        showtime_id=showtime_id,
+        count=count,
+        blocks=[{'seats': list(block.seats), 'score': block.score} for block in blocks],
+    )
+    response.headers['Cache-Control'] = 'no-store'
+    return response
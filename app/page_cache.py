@@ -0,0 +1,64 @@
+"""Rendered-page cache keyed on the catalog version.
+
+Cached bodies are served with a strong ETag derived from their content, so
+browsers and CDNs revalidate with ``If-None-Match`` and get a bodiless ``304``
+while the catalog is unchanged. The cache holds at most ``PAGE_CACHE_SIZE``
+pages and evicts the least recently used one; entries for old catalog versions
+simply age out.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Callable, Hashable
+
+from flask import Response, current_app, request, session
+
+from app.cache import LRUCache
+from app.catalog import get_catalog_version
+
+DEFAULT_SIZE = 64
+
+
+class CachedPage:
+    __slots__ = ('body', 'etag')
+
+    def __init__(self, body: bytes, etag: str) -> None:
+        self.body = body
+        self.etag = etag
+
+
+def _page_cache() -> LRUCache:
+    cache = current_app.extensions.get('page_cache')
+    if cache is None:
+        cache = LRUCache(maxsize=int(current_app.config.get('PAGE_CACHE_SIZE', DEFAULT_SIZE)))
+        current_app.extensions['page_cache'] = cache
+    return cache
+
+
+def _build_response(page: CachedPage) -> Response:
+    response = Response(page.body, mimetype='text/html')
+    response.set_etag(page.etag)
+    # Always revalidate; the ETag makes revalidation nearly free.
+    response.headers['Cache-Control'] = 'public, no-cache'
+    return response.make_conditional(request)
+
+
+def catalog_page(key: Hashable, render: Callable[[], str]) -> Response:
+    """Serve ``render()`` from cache for the current catalog version.
+
+    ``key`` identifies the page variant (endpoint plus any query arguments).
+    Requests with pending flash messages bypass the cache because the messages
+    are rendered into the page and belong to one visitor only.
+    """
+    if '_flashes' in session:
+        return Response(render(), mimetype='text/html')
+
+    cache = _page_cache()
+    cache_key = (get_catalog_version(), key)
+    page = cache.get(cache_key)
+    if page is None:
+        body = render().encode('utf-8')
+        page = CachedPage(body, hashlib.sha256(body).hexdigest()[:32])
+        cache.set(cache_key, page)
+    return _build_response(page)
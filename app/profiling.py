@@ -0,0 +1,115 @@
+"""Development aids: sampled request profiles and an N+1 query detector.
+
+With ``PROFILE_SAMPLE_RATE`` above zero, that fraction of requests runs under
+cProfile and each sampled request writes one ``.prof`` file to
+``PROFILE_DIR``. Read them with ``python -m pstats <file>`` or snakeviz.
+
+``NPLUSONE_DETECT`` watches the statements of every request. Statements with
+the same SQL text have the same shape (parameters are bound separately, and
+expanded ``IN (?, ?, ...)`` lists are collapsed), so a shape that runs
+``NPLUSONE_THRESHOLD`` times in one request is almost always a lazy load in a
+loop, e.g. ``showtime.movie`` in a template. ``warn`` logs the endpoint, the
+statement and the first call site in this repository; ``raise`` raises
+``NPlusOneError`` at that point, which turns the pattern into a test failure.
+
+Both are meant for development and staging and are off by default.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import os
+import random
+import re
+import time
+import traceback
+from collections import Counter
+
+from flask import Flask, current_app, g, has_request_context, request
+from sqlalchemy import event
+
+DETECT_MODES = ('off', 'warn', 'raise')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_IN_LIST = re.compile(r'\((?:\s*(?:\?|%\(\w+\)s|:\w+)\s*,)+\s*(?:\?|%\(\w+\)s|:\w+)\s*\)')
+_UNSAFE = re.compile(r'[^A-Za-z0-9_.-]+')
+
+
+class NPlusOneError(RuntimeError):
+    """Raised in ``raise`` mode when one statement shape repeats within a request."""
+
+
+def statement_shape(statement: str) -> str:
+    """Normalise ``statement`` so expanded IN lists of any length compare equal."""
+    return _IN_LIST.sub('(?)', ' '.join(statement.split()))
+
+
+def _call_site() -> str:
+    """First frame in this repository outside this module (templates included)."""
+    for frame in reversed(traceback.extract_stack()):
+        filename = os.path.abspath(frame.filename)
+        if filename.startswith(ROOT) and filename != os.path.abspath(__file__) and 'site-packages' not in filename:
+            return f'{os.path.relpath(filename, ROOT)}:{frame.lineno}'
+    return 'unknown'
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if not has_request_context() or 'nplusone_shapes' not in g:
+        return
+    shape = statement_shape(statement)
+    shapes: Counter = g.nplusone_shapes
+    shapes[shape] += 1
+    if shapes[shape] != current_app.config['NPLUSONE_THRESHOLD']:
+        return
+
+    message = (
+        f"Kemungkinan N+1 query di {request.endpoint or request.path}: "
+        f"{shapes[shape]}x dari {_call_site()}: {shape}"
+    )
+    if current_app.config['NPLUSONE_DETECT'] == 'raise':
+        raise NPlusOneError(message)
+    current_app.logger.warning(message)
+
+
+def _before_request() -> None:
+    if current_app.config['NPLUSONE_DETECT'] != 'off':
+        g.nplusone_shapes = Counter()
+    rate = current_app.config['PROFILE_SAMPLE_RATE']
+    if rate and random.random() < rate:
+        g.profiler = cProfile.Profile()
+        g.profile_started = time.perf_counter()
+        g.profiler.enable()
+
+
+def _teardown_request(exc) -> None:
+    g.pop('nplusone_shapes', None)
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return
+    profiler.disable()
+    elapsed_ms = (time.perf_counter() - g.pop('profile_started')) * 1000
+
+    directory = current_app.config['PROFILE_DIR']
+    os.makedirs(directory, exist_ok=True)
+    endpoint = _UNSAFE.sub('_', request.endpoint or 'unmatched')
+    filename = f'{time.strftime("%Y%m%d-%H%M%S")}-{endpoint}-{elapsed_ms:.0f}ms-{os.getpid()}-{random.getrandbits(24):06x}.prof'
+    profiler.dump_stats(os.path.join(directory, filename))
+
+
+def init_profiling(app: Flask) -> None:
+    """Install the profiling hooks and, if enabled, the N+1 statement listener."""
+    from app.models import db
+
+    mode = app.config['NPLUSONE_DETECT']
+    if mode not in DETECT_MODES:
+        raise ValueError(f"Unknown NPLUSONE_DETECT {mode!r}")
+
+    if mode != 'off':
+        with app.app_context():
+            engines = list(db.engines.values())
+        for engine in engines:
+            if not event.contains(engine, 'after_cursor_execute', _after_cursor_execute):
+                event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    app.before_request(_before_request)
+    app.teardown_request(_teardown_request)
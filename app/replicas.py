@@ -0,0 +1,62 @@
+"""Optional read-replica routing.
+
+With ``REPLICA_DATABASE_URL`` set, the replica is registered as the
+``replica`` bind and ``db.session`` (a ``RoutingSession``) sends reads made
+while serving a GET/HEAD/OPTIONS request to it. Everything else goes to the
+primary: flushes, Core ``INSERT``/``UPDATE``/``DELETE``, any non-GET request,
+CLI commands and the booking writer thread.
+
+Replicas lag. After a request that changed data the visitor's session is
+pinned to the primary for ``REPLICA_STICKY_SECONDS``, so the redirect after a
+booking shows the seats that were just booked.
+
+Locally, two SQLite files work: copy ``tiketa.db`` to ``tiketa-replica.db``
+and point ``REPLICA_DATABASE_URL`` at the copy (it will not receive new
+writes, which makes the routing easy to see). With PostgreSQL use a streaming
+replica or a second database restored from a dump.
+"""
+
+from __future__ import annotations
+
+import time
+
+from flask import Flask, current_app, g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import UpdateBase
+
+REPLICA_BIND = 'replica'
+READ_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+# Session key holding the time until which this visitor reads from the primary
+SESSION_KEY = 'db_primary_until'
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that sends read-only request queries to the replica."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not isinstance(clause, UpdateBase) and _reads_from_replica():
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _reads_from_replica() -> bool:
+    return has_request_context() and g.get('db_route') == REPLICA_BIND
+
+
+def _before_request() -> None:
+    if request.method in READ_METHODS and session.get(SESSION_KEY, 0) < time.time():
+        g.db_route = REPLICA_BIND
+
+
+def _after_request(response):
+    if request.method not in READ_METHODS and response.status_code < 400:
+        session[SESSION_KEY] = time.time() + current_app.config['REPLICA_STICKY_SECONDS']
+    return response
+
+
+def init_replica(app: Flask) -> None:
+    """Install the request hooks that pick the bind for each request."""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
@@ -0,0 +1,18 @@
+"""TMDB genre ids and names used by the sample and synthetic catalogs."""
+
+SAMPLE_GENRES: dict[int, str] = {
+    12: "Adventure",
+    14: "Fantasy",
+    16: "Animation",
+    18: "Drama",
+    28: "Action",
+    35: "Comedy",
+    53: "Thriller",
+    80: "Crime",
+    878: "Science Fiction",
+    9648: "Mystery",
+    99: "Documentary",
+    10749: "Romance",
+    10751: "Family",
+    10752: "War",
+}
@@ -0,0 +1,108 @@
+"""Synthetic catalog generator for load testing.
+
+Produces production-sized databases in seconds: movies are built in memory
+and written with the bulk helpers in ``app.seeding``, showtimes come from the
+regular scheduler, and bookings are sampled without replacement from every
+(showtime, seat) pair so the unique constraint is never hit.
+"""
+
+from __future__ import annotations
+
+import random
+from bisect import bisect_right
+from datetime import date, timedelta
+
+from sqlalchemy import select
+
+from app.layouts import layout_for_studio
+from app.models import db, Booking, Movie, Showtime
+from app.seat_counts import reconcile_seat_counts
+from app.sample_data.genres import SAMPLE_GENRES
+from app.seeding import insert_genres, insert_movies, insert_rows
+
+_ADJECTIVES = (
+    "Silent", "Crimson", "Last", "Hidden", "Electric", "Golden", "Broken", "Midnight",
+    "Distant", "Wild", "Frozen", "Burning", "Secret", "Endless", "Hollow", "Iron",
+)
+_NOUNS = (
+    "Harbor", "Kingdom", "Signal", "Garden", "Horizon", "Empire", "River", "Machine",
+    "Orchard", "Voyage", "Lantern", "Mirror", "Frontier", "Archive", "Monsoon", "Circuit",
+)
+_FIRST_NAMES = (
+    "Rafi", "Ayu", "Budi", "Citra", "Dimas", "Eka", "Fajar", "Gita",
+    "Hana", "Indra", "Joko", "Kirana", "Lestari", "Made", "Nadia", "Putu",
+)
+
+
+def build_movies(count: int, rng: random.Random) -> list[dict]:
+    """Return ``count`` movie dicts with studio numbers ``1..count``."""
+    genre_ids = list(SAMPLE_GENRES)
+    movies = []
+    for studio_number in range(1, count + 1):
+        title = f"{rng.choice(_ADJECTIVES)} {rng.choice(_NOUNS)} {studio_number}"
+        movies.append({
+            "studio_number": studio_number,
+            "title": title,
+            "description": f"Synthetic feature screening in studio {studio_number}.",
+            "poster_path": None,
+            "backdrop_path": None,
+            "release_date": date(2000, 1, 1) + timedelta(days=rng.randrange(9000)),
+            "trailer_youtube_id": None,
+            "genre_ids": rng.sample(genre_ids, rng.randint(1, 3)),
+        })
+    return movies
+
+
+def insert_random_bookings(count: int, rng: random.Random) -> int:
+    """Book ``count`` random distinct seats across all live showtimes."""
+    showtimes = db.session.execute(
+        select(Showtime.id, Movie.studio_number)
+        .join(Movie, Showtime.movie_id == Movie.id)
+        .where(Showtime.is_archived.is_(False))
+        .order_by(Showtime.id)
+    ).all()
+
+    # Every (showtime, seat) pair gets a slot number; offsets[i] is the first
+    # slot of showtime i, so sampling slots never books the same seat twice.
+    layouts = [layout_for_studio(studio_number) for _, studio_number in showtimes]
+    offsets = []
+    capacity = 0
+    for layout in layouts:
+        offsets.append(capacity)
+        capacity += layout.capacity
+    count = min(count, capacity)
+
+    rows = []
+    for slot in rng.sample(range(capacity), count):
+        showtime_index = bisect_right(offsets, slot) - 1
+        layout = layouts[showtime_index]
+        rows.append({
+            "user": f"{rng.choice(_FIRST_NAMES)} {rng.randrange(1000)}",
+            "seat": layout.seats[slot - offsets[showtime_index]],
+            "showtime_id": showtimes[showtime_index].id,
+        })
+    return insert_rows(Booking, rows)
+
+
+def generate_synthetic_catalog(movies: int, days: int, bookings: int, seed: int | None = None) -> dict[str, int]:
+    """Populate an empty database; return the number of rows created per table."""
+    from generate_schedule import generate_upcoming_showtimes
+
+    rng = random.Random(seed)
+
+    genres_created = insert_genres(SAMPLE_GENRES)
+    insert_movies(build_movies(movies, rng))
+    db.session.commit()
+
+    showtimes_created = generate_upcoming_showtimes(days)
+    bookings_created = insert_random_bookings(bookings, rng)
+    db.session.commit()
+    # Bulk-inserted bookings bypass the booking paths; count them in one UPDATE.
+    reconcile_seat_counts()
+
+    return {
+        "genres": genres_created,
+        "movies": movies,
+        "showtimes": showtimes_created,
+        "bookings": bookings_created,
+    }
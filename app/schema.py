@@ -0,0 +1,264 @@
+"""Schema creation, upgrades and query-plan checks.
+
+The app factory never touches the schema; it only compares the version
+stamped in ``app_meta`` with ``SCHEMA_VERSION`` (one primary-key lookup) and
+logs a warning when they differ. Tables are created by ``flask init-db`` or the
+reset commands.
+
+``db.create_all()`` only creates missing tables; it never adds columns or
+indexes to tables that already exist. ``upgrade_schema`` fills that gap,
+backfills derived columns, stamps the version, and is safe to run repeatedly
+(``flask init-db`` / ``flask upgrade-db``). ``explain_hot_queries`` prints the plans of
+the queries the indexes are designed for (``flask explain-queries``) on SQLite
+and PostgreSQL.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import MetaData, func, inspect, select, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import CreateTable
+
+from app.catalog import write_meta
+from app.models import db, AppMeta, ArchivedBooking, ArchivedShowtime, Booking, Showtime
+from app.seat_counts import reconcile_seat_counts
+from app.seeding import chunked
+
+# Bump whenever a model change needs `flask upgrade-db` on existing databases.
+SCHEMA_VERSION = 3
+SCHEMA_VERSION_KEY = 'schema_version'
+# Live tables whose ids must stay above every id already moved to the archive
+ARCHIVED_IDS = {Showtime: ArchivedShowtime, Booking: ArchivedBooking}
+
+
+def get_schema_version() -> int | None:
+    """Return the stamped schema version, or ``None`` if the schema was never created."""
+    try:
+        value = db.session.scalar(select(AppMeta.value).where(AppMeta.key == SCHEMA_VERSION_KEY))
+    except DBAPIError:
+        # app_meta does not exist yet
+        db.session.rollback()
+        return None
+    return int(value) if value is not None else None
+
+
+def check_schema_version() -> int | None:
+    """Log a warning when the database schema does not match the models."""
+    version = get_schema_version()
+    db.session.remove()
+    if version is None:
+        current_app.logger.warning("Schema database belum dibuat. Jalankan `flask init-db`.")
+    elif version < SCHEMA_VERSION:
+        current_app.logger.warning(
+            "Schema database versi %s, aplikasi butuh versi %s. Jalankan `flask upgrade-db`.",
+            version, SCHEMA_VERSION,
+        )
+    return version
+
+
+def stamp_schema_version() -> None:
+    """Record ``SCHEMA_VERSION`` in the current transaction; the caller commits."""
+    write_meta(db.session.connection(), SCHEMA_VERSION_KEY, str(SCHEMA_VERSION))
+
+
+def create_schema() -> None:
+    """Create every table of an empty database and stamp it; the caller commits."""
+    db.create_all()
+    stamp_schema_version()
+
+
+def _add_missing_columns(inspector) -> list[str]:
+    """``ALTER TABLE ... ADD COLUMN`` for nullable model columns the database lacks."""
+    added = []
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                if not column.nullable:
+                    raise RuntimeError(f"Cannot add NOT NULL column {table.name}.{column.name} automatically")
+                column_type = column.type.compile(dialect=conn.dialect)
+                conn.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}')
+                added.append(f'{table.name}.{column.name}')
+    return added
+
+
+def _rebuild_with_autoincrement(conn) -> list[str]:
+    """SQLite: recreate tables declared ``sqlite_autoincrement`` that were created without it.
+
+    SQLite cannot add AUTOINCREMENT to an existing table, so the table is
+    copied into a new one and renamed back; its indexes are recreated by the
+    index step of ``upgrade_schema``.
+    """
+    if conn.dialect.name != 'sqlite':
+        return []
+    quote = conn.dialect.identifier_preparer.quote
+    rebuilt = []
+    for table in db.metadata.sorted_tables:
+        if not table.dialect_options['sqlite']['autoincrement']:
+            continue
+        stored = conn.exec_driver_sql(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table.name,)
+        ).scalar()
+        if stored is None or 'AUTOINCREMENT' in stored.upper():
+            continue
+
+        # The copy needs the other tables in its metadata to compile its foreign keys
+        metadata = MetaData()
+        for other in db.metadata.sorted_tables:
+            if other is not table:
+                other.to_metadata(metadata)
+        copy = table.to_metadata(metadata, name=f'{table.name}_rebuild')
+        columns = ', '.join(quote(column.name) for column in table.columns)
+        conn.execute(CreateTable(copy))
+        conn.exec_driver_sql(f'INSERT INTO {copy.name} ({columns}) SELECT {columns} FROM {table.name}')
+        conn.exec_driver_sql(f'DROP TABLE {table.name}')
+        conn.exec_driver_sql(f'ALTER TABLE {copy.name} RENAME TO {table.name}')
+        rebuilt.append(table.name)
+    return rebuilt
+
+
+def _raise_sqlite_sequences(conn) -> None:
+    """Start new SQLite ids above the highest archived id of each live table."""
+    if conn.dialect.name != 'sqlite':
+        return
+    for model, archived in ARCHIVED_IDS.items():
+        highest = max(
+            conn.scalar(select(func.max(model.id))) or 0,
+            conn.scalar(select(func.max(archived.id))) or 0,
+        )
+        name = model.__tablename__
+        if conn.exec_driver_sql('SELECT 1 FROM sqlite_sequence WHERE name = ?', (name,)).scalar():
+            conn.exec_driver_sql(
+                'UPDATE sqlite_sequence SET seq = ? WHERE name = ? AND seq < ?', (highest, name, highest)
+            )
+        elif highest:
+            conn.exec_driver_sql('INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)', (name, highest))
+
+
+def backfill_local_dates() -> int:
+    """Fill ``Showtime.local_date`` for rows written before the column existed."""
+    from app.timezones import local_date
+
+    rows = db.session.execute(
+        select(Showtime.id, Showtime.time).where(Showtime.local_date.is_(None))
+    ).all()
+    for chunk in chunked(rows):
+        db.session.execute(
+            update(Showtime),
+            [{'id': showtime_id, 'local_date': local_date(show_time)} for showtime_id, show_time in chunk],
+        )
+    db.session.commit()
+    return len(rows)
+
+
+def upgrade_schema() -> dict[str, list[str] | int]:
+    """Create missing tables, columns and indexes, backfill derived columns and stamp the version.
+
+    Returns the added column names, the tables rebuilt for SQLite
+    AUTOINCREMENT, created index names, the backfilled ``local_date`` row
+    count and the number of seat counters recounted.
+    """
+    db.create_all()
+
+    columns = _add_missing_columns(inspect(db.engine))
+    with db.engine.begin() as conn:
+        rebuilt = _rebuild_with_autoincrement(conn)
+        _raise_sqlite_sequences(conn)
+
+    inspector = inspect(db.engine)
+    indexes = []
+    for table in db.metadata.sorted_tables:
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda idx: idx.name):
+            if index.name not in existing:
+                index.create(bind=db.engine)
+                indexes.append(index.name)
+
+    backfilled = backfill_local_dates()
+    seat_counts = reconcile_seat_counts()
+    stamp_schema_version()
+    db.session.commit()
+    return {
+        'columns': columns,
+        'rebuilt': rebuilt,
+        'indexes': indexes,
+        'backfilled': backfilled,
+        'seat_counts': seat_counts,
+    }
+
+
+def hot_queries() -> dict[str, object]:
+    """The statements our indexes serve, with representative parameters."""
+    now = datetime.utcnow()
+    horizon = now + timedelta(days=3)
+    return {
+        'movie_detail showtimes': (
+            select(Showtime)
+            .where(
+                Showtime.movie_id == 1,
+                Showtime.time >= now,
+                Showtime.time <= horizon,
+                Showtime.is_archived.is_(False),
+            )
+            .order_by(Showtime.time)
+        ),
+        'purge_past_showtimes': (
+            update(Showtime)
+            .where(Showtime.time < now, Showtime.is_archived.is_(False))
+            .values(is_archived=True)
+        ),
+        'generate_upcoming_showtimes window': (
+            select(Showtime.id, Showtime.movie_id, Showtime.time)
+            .where(Showtime.time.between(now, horizon), Showtime.is_archived.is_(False))
+        ),
+        'seat availability': (
+            select(Booking.id, Booking.seat).where(Booking.showtime_id == 1)
+        ),
+        'showtimes on a local date': (
+            select(Showtime.id, Showtime.movie_id, Showtime.time)
+            .where(Showtime.local_date == now.date(), Showtime.is_archived.is_(False))
+        ),
+    }
+
+
+def _explain_prefix(dialect_name: str) -> str:
+    if dialect_name == 'sqlite':
+        return 'EXPLAIN QUERY PLAN '
+    if dialect_name == 'postgresql':
+        return 'EXPLAIN '
+    raise ValueError(f"Query plans are only supported on SQLite and PostgreSQL, not {dialect_name}")
+
+
+def explain(statement) -> tuple[str, list[str]]:
+    """Return the compiled SQL of ``statement`` and its plan lines."""
+    with db.engine.connect() as conn:
+        compiled = statement.compile(dialect=conn.dialect)
+        params = {
+            key: (
+                value.isoformat(' ') if isinstance(value, datetime)
+                else value.isoformat() if isinstance(value, date)
+                else value
+            )
+            for key, value in compiled.params.items()
+        }
+        if compiled.positional:
+            params = tuple(params[name] for name in compiled.positiontup)
+
+        sql = str(compiled)
+        rows = conn.exec_driver_sql(_explain_prefix(conn.dialect.name) + sql, params).all()
+        # EXPLAIN never executes the statement, but roll back to be explicit.
+        conn.rollback()
+
+    if conn.dialect.name == 'sqlite':
+        # (id, parent, notused, detail)
+        return sql, [row[-1] for row in rows]
+    return sql, [row[0] for row in rows]
+
+
+def explain_hot_queries() -> dict[str, tuple[str, list[str]]]:
+    return {name: explain(statement) for name, statement in hot_queries().items()}
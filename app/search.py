@@ -0,0 +1,131 @@
+"""In-memory title and genre search over the movie catalog.
+
+The index is two inverted maps built from ``Movie`` and ``Genre`` with two
+column-only queries:
+
+* normalised genre name -> set of movie ids
+* every prefix of every normalised title token -> set of movie ids
+
+A query is answered with set intersections only: each search word must prefix
+some title token, and every selected genre must match. Sets are intersected
+smallest first, so adding genres makes a query cheaper, not dearer. Results
+come back in studio order, like the unfiltered listing.
+
+The index is built on first use and rebuilt when the catalog version
+(``app.catalog``) changes, which costs one primary-key lookup per search.
+Normalisation lower-cases, strips accents and splits on anything that is not
+a letter or digit, so "Amélie" is found by "ame" and "Spider-Man" by "spider man".
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+import unicodedata
+from typing import Iterable
+
+from flask import current_app
+from sqlalchemy import select
+
+from app.catalog import get_catalog_version
+from app.models import db, Genre, Movie, movie_genres
+
+# Longer search words still match, they are just not indexed as separate prefixes
+MAX_PREFIX_LENGTH = 20
+
+_TOKEN = re.compile(r'[^\W_]+')
+
+
+def normalize(text: str) -> str:
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN.findall(normalize(text))
+
+
+class SearchIndex:
+    """Immutable snapshot of the catalog for one catalog version."""
+
+    def __init__(
+        self,
+        version: str,
+        movies: Iterable[tuple[int, str, int]],
+        genre_links: Iterable[tuple[int, str]],
+    ) -> None:
+        self.version = version
+        self.studio_of: dict[int, int] = {}
+        self.title_of: dict[int, str] = {}
+        self.tokens_of: dict[int, list[str]] = {}
+        self.prefixes: dict[str, set[int]] = {}
+        for movie_id, title, studio_number in movies:
+            self.studio_of[movie_id] = studio_number
+            self.title_of[movie_id] = title
+            self.tokens_of[movie_id] = tokenize(title)
+            for token in self.tokens_of[movie_id]:
+                for end in range(1, min(len(token), MAX_PREFIX_LENGTH) + 1):
+                    self.prefixes.setdefault(token[:end], set()).add(movie_id)
+
+        self.genre_names: dict[str, str] = {}
+        self.genres: dict[str, set[int]] = {}
+        self.genres_of: dict[int, list[str]] = {}
+        for movie_id, name in genre_links:
+            key = normalize(name)
+            self.genre_names.setdefault(key, name)
+            self.genres.setdefault(key, set()).add(movie_id)
+            self.genres_of.setdefault(movie_id, []).append(name)
+
+    @classmethod
+    def build(cls, version: str) -> 'SearchIndex':
+        movies = db.session.execute(select(Movie.id, Movie.title, Movie.studio_number))
+        genre_links = db.session.execute(
+            select(movie_genres.c.movie_id, Genre.name)
+            .join(Genre, Genre.id == movie_genres.c.genre_id)
+            .order_by(Genre.name)
+        )
+        return cls(version, movies, genre_links)
+
+    def _word_matches(self, word: str) -> set[int]:
+        matches = self.prefixes.get(word[:MAX_PREFIX_LENGTH], set())
+        if len(word) > MAX_PREFIX_LENGTH:
+            # Narrowed by the indexed prefix; confirm against the full tokens
+            matches = {
+                movie_id for movie_id in matches
+                if any(token.startswith(word) for token in self.tokens_of[movie_id])
+            }
+        return matches
+
+    def search(self, query: str = '', genres: Iterable[str] = ()) -> list[int]:
+        """Movie ids matching every word of ``query`` and every genre, in studio order.
+
+        Unknown genres match nothing; an empty query and no genres match everything.
+        """
+        candidates = [self._word_matches(word) for word in tokenize(query)]
+        candidates += [self.genres.get(normalize(name), set()) for name in genres if name.strip()]
+        if not candidates:
+            matched: Iterable[int] = self.studio_of
+        else:
+            candidates.sort(key=len)
+            matched = candidates[0].intersection(*candidates[1:])
+        return sorted(matched, key=self.studio_of.__getitem__)
+
+    def genre_choices(self) -> list[str]:
+        """Display names of every genre that has at least one movie."""
+        return sorted(self.genre_names.values(), key=normalize)
+
+
+_build_lock = threading.Lock()
+
+
+def get_search_index() -> SearchIndex:
+    """Return the index for the current catalog version, rebuilding it if stale."""
+    version = get_catalog_version()
+    index = current_app.extensions.get('search_index')
+    if index is not None and index.version == version:
+        return index
+    with _build_lock:
+        index = current_app.extensions.get('search_index')
+        if index is None or index.version != version:
+            index = current_app.extensions['search_index'] = SearchIndex.build(version)
+    return index
@@ -0,0 +1,60 @@
+"""Materialised booked-seat counters on ``Showtime``.
+
+``Showtime.seats_booked`` is bumped in the same transaction that inserts the
+bookings, so pages that list many showtimes can show seats left (capacity
+from the studio layout minus the counter) without a ``COUNT(*)`` per
+showtime. Double booking is still prevented by ``uq_booking_showtime_seat``;
+a rejected insert rolls the counter update back with it.
+
+Rows written outside the booking paths (bulk seeds, manual SQL, databases
+from before the column existed) can drift. ``reconcile_seat_counts`` rewrites
+every counter that disagrees with the bookings table (``flask
+reconcile-seat-counts``).
+"""
+
+from __future__ import annotations
+
+from typing import Mapping
+
+from sqlalchemy import func, or_, select, update
+
+from app.models import db, Booking, Showtime
+
+
+def add_seats_booked(counts: Mapping[int, int]) -> None:
+    """Add ``counts[showtime_id]`` to each counter in the current transaction."""
+    for showtime_id, count in counts.items():
+        db.session.execute(
+            update(Showtime)
+            .where(Showtime.id == showtime_id)
+            .values(seats_booked=func.coalesce(Showtime.seats_booked, 0) + count)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def lock_showtimes(showtime_ids) -> None:
+    """Take the row locks of ``showtime_ids`` for paths that only learn their counts after inserting."""
+    db.session.execute(
+        select(Showtime.id).where(Showtime.id.in_(sorted(set(showtime_ids)))).with_for_update()
+    )
+
+
+def seats_left(showtime: Showtime, capacity: int) -> int:
+    return max(capacity - (showtime.seats_booked or 0), 0)
+
+
+def reconcile_seat_counts() -> int:
+    """Recount bookings for every showtime whose counter is wrong; return the rows fixed."""
+    counted = (
+        select(func.count(Booking.id))
+        .where(Booking.showtime_id == Showtime.id)
+        .scalar_subquery()
+    )
+    fixed = db.session.execute(
+        update(Showtime)
+        .where(or_(Showtime.seats_booked.is_(None), Showtime.seats_booked != counted))
+        .values(seats_booked=counted)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    return fixed
@@ -0,0 +1,126 @@
+"""Precompiled seat-grid markup.
+
+The structure of the seat chart (rows, aisles, walkway, seat labels) never
+changes, so each ``SeatLayout`` is compiled once, on first use, into static HTML fragments
+plus one pre-rendered button per seat and state. A request only picks a
+variant per seat from the occupancy bitmap and joins the strings, instead of
+walking the layout in Jinja. Only taken seats whose booker is known are
+rendered per request, so their tooltip can name the booker.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+
+from jinja2.utils import htmlsafe_json_dumps
+from markupsafe import Markup, escape
+
+from app.layouts import SeatLayout
+
+AVAILABLE, TAKEN, HELD, MINE = range(4)
+
+
+def _taken_button(seat_id: str, user: str) -> str:
+    label = escape(seat_id)
+    name = escape(user)
+    js_args = escape(f'{htmlsafe_json_dumps(seat_id)}, {htmlsafe_json_dumps(user)}')
+    return (
+        f'<button type="button" class="seat taken" data-seat="{label}" data-user="{name}" '
+        f'title="Seat {label} · {name}" onclick="showTaken({js_args})">{label}</button>'
+    )
+
+
+def _seat_button(seat_id: str, state: int) -> str:
+    label = escape(seat_id)
+    js_seat = htmlsafe_json_dumps(seat_id)
+    if state == TAKEN:
+        return (
+            f'<button type="button" class="seat taken" data-seat="{label}" '
+            f'title="Seat {label} sudah dipesan" onclick=\'showTaken({js_seat})\'>{label}</button>'
+        )
+    if state == HELD:
+        return (
+            f'<button type="button" class="seat held" data-seat="{label}" '
+            f'title="Seat {label} sedang ditahan" onclick=\'showHeld({js_seat})\'>{label}</button>'
+        )
+    css_class = 'selected' if state == MINE else 'available'
+    return (
+        f'<button type="button" class="seat {css_class}" data-seat="{label}" '
+        f'onclick=\'selectSeat({js_seat})\'>{label}</button>'
+    )
+
+
+class CompiledSeatGrid:
+    """Static fragments interleaved with per-seat button variants.
+
+    ``_static[i]`` precedes the ``i``-th seat cell and ``_static[-1]`` closes
+    the grid, so rendering is a single pass over ``_cells``.
+    """
+
+    __slots__ = ('_static', '_cells')
+
+    def __init__(self, layout: SeatLayout) -> None:
+        columns = layout.columns
+        static: list[str] = []
+        cells: list[tuple[str, int, tuple[str, str, str, str]]] = []
+        pending = [f'<div class="seat-grid" style="--grid-columns: {columns}">']
+
+        for row in layout.grid:
+            is_walkway_row = all(seat_id is None for seat_id in row)
+            aisle = (
+                '<div class="aisle aisle--walkway" aria-hidden="true"></div>'
+                if is_walkway_row
+                else '<div class="aisle" aria-hidden="true"></div>'
+            )
+            for seat_id in row:
+                if seat_id is None:
+                    pending.append(aisle)
+                    continue
+                static.append(''.join(pending))
+                pending = []
+                variants = tuple(_seat_button(seat_id, state) for state in (AVAILABLE, TAKEN, HELD, MINE))
+                cells.append((seat_id, layout.index[seat_id], variants))
+
+        pending.append('</div>')
+        static.append(''.join(pending))
+        self._static = tuple(static)
+        self._cells = tuple(cells)
+
+    def render(
+        self,
+        bits: int,
+        held: frozenset[str] | set[str] = frozenset(),
+        mine: frozenset[str] | set[str] = frozenset(),
+        users: dict[str, str] | None = None,
+    ) -> Markup:
+        """Render the grid for an occupancy bitmap and the current holds.
+
+        ``users`` maps taken seats to their bookers; seats missing from it
+        get the precompiled button without a name.
+        """
+        users = users or {}
+        static = self._static
+        out = [static[0]]
+        append = out.append
+        for position, (seat_id, index, variants) in enumerate(self._cells):
+            if (bits >> index) & 1:
+                user = users.get(seat_id)
+                append(_taken_button(seat_id, user) if user else variants[TAKEN])
+            elif seat_id in held:
+                append(variants[HELD])
+            elif seat_id in mine:
+                append(variants[MINE])
+            else:
+                append(variants[AVAILABLE])
+            append(static[position + 1])
+        return Markup(''.join(out))
+
+
+@lru_cache(maxsize=None)
+def _compiled(layout: SeatLayout) -> CompiledSeatGrid:
+    return CompiledSeatGrid(layout)
+
+
+def render_seat_grid(layout: SeatLayout, bits: int, held=frozenset(), mine=frozenset(), users=None) -> Markup:
+    """Render the seat chart of ``layout``, compiling it on first use."""
+    return _compiled(layout).render(bits, held, mine, users)
@@ -0,0 +1,83 @@
+"""Bulk insert helpers shared by the seed commands and maintenance scripts.
+
+Everything here writes with multi-row ``INSERT`` statements (executemany) in
+chunks of ``BULK_CHUNK_SIZE`` and leaves committing to the caller, so a whole
+catalog lands in a handful of statements and one transaction. Core inserts
+skip ORM flush events, so the movie and genre helpers bump the catalog version
+explicitly.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Iterator, Sequence, TypeVar
+
+from sqlalchemy import insert, select
+
+from app.catalog import bump_catalog_version
+from app.models import db, Movie, Genre, movie_genres
+
+# Upper bound on ids per IN (...) / rows per executemany batch
+BULK_CHUNK_SIZE = 500
+
+T = TypeVar('T')
+
+
+def chunked(items: Sequence[T], size: int = BULK_CHUNK_SIZE) -> Iterator[Sequence[T]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def insert_genres(genres: dict[int, str]) -> int:
+    """Insert the genres that do not exist yet; return how many were added."""
+    existing = set(db.session.scalars(select(Genre.id).where(Genre.id.in_(list(genres)))))
+    rows = [
+        {'id': genre_id, 'name': name}
+        for genre_id, name in genres.items()
+        if genre_id not in existing
+    ]
+    for chunk in chunked(rows):
+        db.session.execute(insert(Genre), chunk)
+    if rows:
+        bump_catalog_version()
+    return len(rows)
+
+
+def insert_movies(movies: Iterable[dict]) -> dict[int, int]:
+    """Insert movies and their genre links; return ``{studio_number: movie_id}``.
+
+    Each movie is a dict of ``Movie`` columns and may carry ``genre_ids``
+    (linked through ``movie_genres``) and a display-only ``genres`` list,
+    which is ignored.
+    """
+    movies = list(movies)
+    payloads = [
+        {key: value for key, value in movie.items() if key not in {'genre_ids', 'genres'}}
+        for movie in movies
+    ]
+
+    ids_by_studio: dict[int, int] = {}
+    for chunk in chunked(payloads):
+        result = db.session.execute(
+            insert(Movie).returning(Movie.id, Movie.studio_number),
+            chunk,
+        )
+        ids_by_studio.update({studio_number: movie_id for movie_id, studio_number in result})
+
+    links = [
+        {'movie_id': ids_by_studio[movie['studio_number']], 'genre_id': genre_id}
+        for movie in movies
+        for genre_id in dict.fromkeys(movie.get('genre_ids', ()))
+    ]
+    for chunk in chunked(links):
+        db.session.execute(movie_genres.insert(), chunk)
+
+    if movies:
+        bump_catalog_version()
+    return ids_by_studio
+
+
+def insert_rows(model: type[db.Model], rows: Sequence[dict]) -> int:
+    """Bulk insert plain column dicts for ``model``; return the row count."""
+    for chunk in chunked(rows):
+        db.session.execute(insert(model), chunk)
+    return len(rows)
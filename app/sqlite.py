@@ -0,0 +1,59 @@
+"""SQLite production mode.
+
+In the default rollback-journal mode a writer blocks every reader and two
+writers that both started as readers fail with "database is locked". With
+``SQLITE_WAL`` enabled each new connection switches the database to
+write-ahead logging (readers never block the writer and vice versa), waits
+``SQLITE_BUSY_TIMEOUT`` milliseconds for a lock instead of failing, and uses
+``synchronous=NORMAL``, which is durable across application crashes and only
+loses the last commits on power loss.
+
+Booking writes are serialised separately by ``app.booking_writer``.
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SYNCHRONOUS_MODES = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+
+def is_sqlite_file(engine: Engine) -> bool:
+    """True for file-backed SQLite; in-memory databases cannot use WAL."""
+    return engine.dialect.name == 'sqlite' and engine.url.database not in (None, '', ':memory:')
+
+
+def configure_sqlite(engine: Engine, busy_timeout_ms: int = 5000, synchronous: str = 'NORMAL') -> bool:
+    """Apply the WAL pragmas to every new connection of ``engine``.
+
+    Returns ``False`` (and does nothing) for engines that are not file-backed
+    SQLite.
+    """
+    if not is_sqlite_file(engine):
+        return False
+    synchronous = synchronous.upper()
+    if synchronous not in SYNCHRONOUS_MODES:
+        raise ValueError(f"Unknown SQLITE_SYNCHRONOUS {synchronous!r}")
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute(f'PRAGMA busy_timeout={int(busy_timeout_ms)}')
+        cursor.execute(f'PRAGMA synchronous={synchronous}')
+        cursor.close()
+
+    return True
+
+
+def begin_immediate(connection) -> None:
+    """Take SQLite's write lock up front.
+
+    pysqlite only starts a transaction on the first write, so a transaction
+    that reads before it writes can deadlock against another writer. ``BEGIN
+    IMMEDIATE`` makes the reads that follow authoritative until commit.
+    No-op on other databases.
+    """
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql('BEGIN IMMEDIATE')
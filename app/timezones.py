@@ -0,0 +1,91 @@
+"""UTC <-> local time conversions for showtimes.
+
+Showtimes are stored as naive UTC and shown in Asia/Jakarta time. Jakarta has
+been on a fixed UTC+7 since 1964, so converting any instant after a zone's last
+transition is just adding the offset. That offset is resolved once per zone
+from the pytz transition table; ``pytz`` is only consulted for instants before
+the last transition and for zones that still change offset (DST).
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, tzinfo
+from functools import lru_cache
+from typing import Iterable, NamedTuple
+
+import pytz
+
+LOCAL_TZ = pytz.timezone('Asia/Jakarta')
+UTC = pytz.UTC
+
+# Every showtime runs for two hours
+SHOWTIME_DURATION = timedelta(hours=2)
+
+
+class FixedOffset(NamedTuple):
+    since_utc: datetime
+    offset: timedelta
+    tzinfo: tzinfo
+
+
+@lru_cache(maxsize=None)
+def fixed_offset(zone: tzinfo) -> FixedOffset | None:
+    """Offset that ``zone`` keeps from ``since_utc`` on, or ``None`` if it still changes."""
+    transitions = getattr(zone, '_utc_transition_times', None)
+    if not transitions:
+        offset = zone.utcoffset(datetime(2000, 1, 1))
+        return FixedOffset(datetime.min, offset, zone)
+
+    last = transitions[-1]
+    if last > datetime.utcnow():
+        # pytz lists DST transitions years ahead
+        return None
+    local = UTC.localize(last).astimezone(zone)
+    return FixedOffset(last, local.utcoffset(), local.tzinfo)
+
+
+def to_local(utc_naive: datetime, zone: tzinfo = LOCAL_TZ) -> datetime:
+    """Convert a naive UTC datetime into an aware datetime in ``zone``."""
+    fixed = fixed_offset(zone)
+    if fixed is not None and utc_naive >= fixed.since_utc:
+        return (utc_naive + fixed.offset).replace(tzinfo=fixed.tzinfo)
+    return UTC.localize(utc_naive).astimezone(zone)
+
+
+def to_local_naive(utc_naive: datetime, zone: tzinfo = LOCAL_TZ) -> datetime:
+    """Convert a naive UTC datetime into a naive local datetime."""
+    return to_local(utc_naive, zone).replace(tzinfo=None)
+
+
+def to_utc_naive(local_dt: datetime, zone: tzinfo = LOCAL_TZ) -> datetime:
+    """Convert a local datetime (naive or aware) into a naive UTC datetime."""
+    if local_dt.tzinfo is not None:
+        return local_dt.astimezone(UTC).replace(tzinfo=None)
+    fixed = fixed_offset(zone)
+    if fixed is not None:
+        utc_naive = local_dt - fixed.offset
+        if utc_naive >= fixed.since_utc:
+            return utc_naive
+    return zone.localize(local_dt).astimezone(UTC).replace(tzinfo=None)
+
+
+def local_date(utc_naive: datetime, zone: tzinfo = LOCAL_TZ) -> date:
+    """Calendar date of a naive UTC datetime in ``zone``."""
+    return to_local(utc_naive, zone).date()
+
+
+def localize_showtimes(showtimes: Iterable, zone: tzinfo = LOCAL_TZ) -> list:
+    """Set ``local_start``/``local_end`` on each showtime and return them as a list.
+
+    The offset is resolved once for the whole batch.
+    """
+    showtimes = list(showtimes)
+    fixed = fixed_offset(zone)
+    for showtime in showtimes:
+        if fixed is not None and showtime.time >= fixed.since_utc:
+            local_start = (showtime.time + fixed.offset).replace(tzinfo=fixed.tzinfo)
+        else:
+            local_start = UTC.localize(showtime.time).astimezone(zone)
+        showtime.local_start = local_start
+        showtime.local_end = local_start + SHOWTIME_DURATION
+    return showtimes
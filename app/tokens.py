@@ -0,0 +1,13 @@
+"""Bearer-token checks for operator endpoints (exports, metrics)."""
+
+from __future__ import annotations
+
+import hmac
+
+from flask import request
+
+
+def bearer_token_matches(expected: str) -> bool:
+    """True when the request sends ``Authorization: Bearer <expected>``; constant-time."""
+    scheme, _, supplied = request.headers.get('Authorization', '').partition(' ')
+    return scheme.lower() == 'bearer' and hmac.compare_digest(supplied.encode(), expected.encode())
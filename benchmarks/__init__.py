@@ -0,0 +1 @@
+"""Benchmarks for the Tiketa app; see ``python -m benchmarks.http_bench --help``."""
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Micro-benchmark for the best-available seat allocator.
+
+Times ``best_available()`` against random occupancy bitmaps of the default
+layout, without a database or Flask app.
+
+Usage (from the repository root)::
+
+    python -m benchmarks.allocator_bench
+    python -m benchmarks.allocator_bench --count 6 --fill 0.85 --runs 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+
+from app.allocator import best_available, candidate_blocks
+from app.availability import seats_to_bits
+from app.layouts import DEFAULT_LAYOUT
+
+
+def random_bitmaps(fill: float, samples: int, rng: random.Random) -> list[int]:
+    seats = DEFAULT_LAYOUT.seats
+    taken = int(len(seats) * fill)
+    return [seats_to_bits(DEFAULT_LAYOUT, rng.sample(seats, taken)) for _ in range(samples)]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=4, help='group size')
+    parser.add_argument('--fill', type=float, default=0.7, help='fraction of seats already booked')
+    parser.add_argument('--limit', type=int, default=3, help='blocks to suggest')
+    parser.add_argument('--runs', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    bitmaps = random_bitmaps(args.fill, 256, rng)
+
+    started = time.perf_counter()
+    candidate_blocks(DEFAULT_LAYOUT, args.count)
+    compile_ms = (time.perf_counter() - started) * 1000
+
+    found = 0
+    started = time.perf_counter()
+    for run in range(args.runs):
+        if best_available(DEFAULT_LAYOUT, bitmaps[run % len(bitmaps)], args.count, args.limit):
+            found += 1
+    elapsed = time.perf_counter() - started
+
+    print(f'layout: {DEFAULT_LAYOUT.name} ({DEFAULT_LAYOUT.capacity} seats), '
+          f'{len(candidate_blocks(DEFAULT_LAYOUT, args.count))} candidate blocks of {args.count}')
+    print(f'precompute: {compile_ms:.2f} ms (once per layout and group size)')
+    print(f'lookup: {elapsed / args.runs * 1e6:.1f} us per call over {args.runs} runs, '
+          f'fill {args.fill:.0%}, found a block in {found / args.runs:.0%}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""Reproducible HTTP benchmark for the index, detail and booking routes.
+
+By default the benchmark builds a synthetic SQLite database in a temporary
+directory and drives the app through the Flask test client, counting SQL
+statements per request with SQLAlchemy engine events. Statements run on other
+threads during a scenario (the ``BOOKING_WRITER=queue`` writer) are shared out
+over its requests and included in ``sql_per_request``; ``background_sql_per_request``
+shows that share on its own. ``--url`` points the same scenarios at a running
+server instead (SQL counts are then unknown).
+
+Usage (from the repository root)::
+
+    python -m benchmarks.http_bench --output before.json
+    python -m benchmarks.http_bench --output after.json
+    python -m benchmarks.http_bench --compare before.json after.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+from typing import Callable
+
+ROUTES = ('index', 'movie_detail', 'book_ticket_get', 'book_ticket_post', 'book_ticket_concurrent')
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile of ``samples`` (which need not be sorted)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(
+    latencies: list[float],
+    wall_seconds: float,
+    statements: list[int] | None,
+    statuses: dict[int, int],
+    background: int | None = None,
+) -> dict:
+    count = len(latencies)
+    total = None if statements is None else sum(statements) + (background or 0)
+    return {
+        'requests': count,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'rps': round(count / wall_seconds, 1) if wall_seconds else 0.0,
+        'sql_per_request': round(total / count, 2) if total is not None and count else None,
+        'background_sql_per_request': round(background / count, 2) if background is not None and count else None,
+        'statuses': {str(code): n for code, n in sorted(statuses.items())},
+    }
+
+
+class SqlCounter:
+    """Counts cursor executions via SQLAlchemy engine events.
+
+    Statements on a thread inside ``begin()``/``end()`` count towards that
+    thread's request; everything else (the booking writer) goes to the shared
+    ``background`` total.
+    """
+
+    def __init__(self, engine) -> None:
+        from sqlalchemy import event
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.background = 0
+        event.listen(engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, *args, **kwargs) -> None:
+        if getattr(self._local, 'active', False):
+            self._local.count += 1
+        else:
+            with self._lock:
+                self.background += 1
+
+    def begin(self) -> None:
+        self._local.count = 0
+        self._local.active = True
+
+    def end(self) -> None:
+        self._local.active = False
+
+    @property
+    def count(self) -> int:
+        return getattr(self._local, 'count', 0)
+
+
+class TestClientDriver:
+    """Issues requests in-process through ``app.test_client()``."""
+
+    def __init__(self, app, counter: SqlCounter) -> None:
+        self.app = app
+        self.counter = counter
+        self._local = threading.local()
+
+    @property
+    def client(self):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        return client
+
+    def request(self, method: str, path: str, json_body: dict | None = None) -> tuple[int, float, int | None]:
+        self.counter.begin()
+        started = time.perf_counter()
+        response = self.client.open(path, method=method, json=json_body)
+        response.get_data()
+        elapsed = time.perf_counter() - started
+        self.counter.end()
+        return response.status_code, elapsed, self.counter.count
+
+    def background_statements(self) -> int:
+        return self.counter.background
+
+
+class HttpDriver:
+    """Issues requests against a running server with ``urllib``."""
+
+    def __init__(self, base_url: str) -> None:
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method: str, path: str, json_body: dict | None = None) -> tuple[int, float, int | None]:
+        data = None
+        headers = {}
+        if json_body is not None:
+            data = json.dumps(json_body).encode()
+            headers['Content-Type'] = 'application/json'
+        req = urllib.request.Request(self.base_url + path, data=data, method=method, headers=headers)
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as exc:
+            exc.read()
+            status = exc.code
+        return status, time.perf_counter() - started, None
+
+    def background_statements(self) -> None:
+        return None
+
+
+def run_sequential(driver, make_request: Callable[[int], tuple[str, str, dict | None]], count: int, warmup: int) -> dict:
+    for i in range(warmup):
+        driver.request(*make_request(i))
+
+    latencies: list[float] = []
+    statements: list[int] = []
+    statuses: dict[int, int] = {}
+    background = driver.background_statements()
+    started = time.perf_counter()
+    for i in range(count):
+        status, elapsed, sql = driver.request(*make_request(warmup + i))
+        latencies.append(elapsed)
+        if sql is not None:
+            statements.append(sql)
+        statuses[status] = statuses.get(status, 0) + 1
+    wall = time.perf_counter() - started
+    return summarize(latencies, wall, statements or None, statuses, _background_since(driver, background))
+
+
+def _background_since(driver, before: int | None) -> int | None:
+    after = driver.background_statements()
+    return None if before is None or after is None else after - before
+
+
+def run_concurrent(driver, make_request: Callable[[int], tuple[str, str, dict | None]], count: int, threads: int) -> dict:
+    latencies: list[float] = []
+    statements: list[int] = []
+    statuses: dict[int, int] = {}
+    lock = threading.Lock()
+    per_thread = max(1, count // threads)
+    barrier = threading.Barrier(threads)
+
+    def worker(thread_index: int) -> None:
+        barrier.wait()
+        for i in range(per_thread):
+            status, elapsed, sql = driver.request(*make_request(thread_index * per_thread + i))
+            with lock:
+                latencies.append(elapsed)
+                if sql is not None:
+                    statements.append(sql)
+                statuses[status] = statuses.get(status, 0) + 1
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    background = driver.background_statements()
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    wall = time.perf_counter() - started
+    result = summarize(latencies, wall, statements or None, statuses, _background_since(driver, background))
+    result['threads'] = threads
+    return result
+
+
+def build_app(args):
+    """Create an app bound to a fresh synthetic SQLite database."""
+    from app import create_app
+    from app.models import db
+    from app.sample_data.synthetic import generate_synthetic_catalog
+    from app.schema import create_schema
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix='tiketa-bench-'), 'bench.db')
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+        'SQLITE_WAL': args.sqlite_wal,
+        'BOOKING_WRITER': args.booking_writer,
+        'SCHEMA_CHECK': False,
+        'METRICS_ENABLED': not args.no_metrics,
+    })
+    with app.app_context():
+        create_schema()
+        generate_synthetic_catalog(args.movies, args.days, args.bookings, seed=args.seed)
+    return app, db_path
+
+
+def pick_targets(app) -> tuple[list[int], list[int]]:
+    from sqlalchemy import select
+    from app.models import db, Movie, Showtime
+
+    with app.app_context():
+        movie_ids = list(db.session.scalars(select(Movie.id).order_by(Movie.id)))
+        showtime_ids = list(db.session.scalars(
+            select(Showtime.id).where(Showtime.is_archived.is_(False)).order_by(Showtime.id)
+        ))
+    return movie_ids, showtime_ids
+
+
+def run_benchmarks(args) -> dict:
+    from app.layouts import DEFAULT_LAYOUT
+
+    rng = random.Random(args.seed)
+    meta = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'requests_per_route': args.requests,
+        'threads': args.threads,
+        'seed': args.seed,
+    }
+
+    if args.url:
+        driver = HttpDriver(args.url)
+        movie_ids = [int(x) for x in args.movie_ids.split(',')]
+        showtime_ids = [int(x) for x in args.showtime_ids.split(',')]
+        meta['target'] = args.url
+    else:
+        from app.models import db
+
+        app, db_path = build_app(args)
+        with app.app_context():
+            counter = SqlCounter(db.engine)
+        driver = TestClientDriver(app, counter)
+        movie_ids, showtime_ids = pick_targets(app)
+        meta.update(
+            target='test_client', database=db_path, movies=args.movies, days=args.days, bookings=args.bookings,
+            sqlite_wal=args.sqlite_wal, booking_writer=args.booking_writer, metrics=not args.no_metrics,
+        )
+
+    # Booking scenarios use one showtime each. The sequential run hands seats
+    # out in layout order, so its only conflicts are seats the synthetic
+    # bookings already took; the concurrent run picks seats at random.
+    post_showtime, hot_showtime = showtime_ids[-1], showtime_ids[-2]
+    seats = list(DEFAULT_LAYOUT.seats)
+
+    def index(_i):
+        return 'GET', '/', None
+
+    def detail(_i):
+        return 'GET', f'/movie/{rng.choice(movie_ids)}', None
+
+    def book_get(_i):
+        return 'GET', f'/book/{rng.choice(showtime_ids)}', None
+
+    def book_post(i):
+        return 'POST', f'/book/{post_showtime}', {'user': f'bench {i}', 'seats': [seats[i % len(seats)]]}
+
+    def book_concurrent(i):
+        return 'POST', f'/book/{hot_showtime}', {'user': f'rush {i}', 'seats': [rng.choice(seats)]}
+
+    results = {
+        'index': run_sequential(driver, index, args.requests, args.warmup),
+        'movie_detail': run_sequential(driver, detail, args.requests, args.warmup),
+        'book_ticket_get': run_sequential(driver, book_get, args.requests, args.warmup),
+        'book_ticket_post': run_sequential(driver, book_post, min(args.requests, len(seats)), 0),
+        'book_ticket_concurrent': run_concurrent(driver, book_concurrent, args.requests, args.threads),
+    }
+    return {'meta': meta, 'results': results}
+
+
+def compare(before_path: str, after_path: str) -> None:
+    with open(before_path) as fh:
+        before = json.load(fh)['results']
+    with open(after_path) as fh:
+        after = json.load(fh)['results']
+
+    header = f"{'route':<24}{'metric':<18}{'before':>12}{'after':>12}{'change':>10}"
+    print(header)
+    print('-' * len(header))
+    for route in ROUTES:
+        if route not in before or route not in after:
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms', 'rps', 'sql_per_request', 'background_sql_per_request'):
+            old, new = before[route].get(metric), after[route].get(metric)
+            if old is None or new is None:
+                continue
+            change = f"{(new - old) / old * 100:+.1f}%" if old else 'n/a'
+            print(f"{route:<24}{metric:<18}{old:>12}{new:>12}{change:>10}")
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"{'route':<24}{'reqs':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'rps':>10}"
+        f"{'sql/req':>9}{'of which bg':>13}  statuses"
+    )
+    for route, result in report['results'].items():
+        sql = result['sql_per_request']
+        background = result.get('background_sql_per_request')
+        print(
+            f"{route:<24}{result['requests']:>6}{result['p50_ms']:>10}{result['p95_ms']:>10}"
+            f"{result['p99_ms']:>10}{result['rps']:>10}{'-' if sql is None else sql:>9}"
+            f"{'-' if background is None else background:>13}  {result['statuses']}"
+        )
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=300, help='requests per route (default: 300)')
+    parser.add_argument('--warmup', type=int, default=20, help='unmeasured requests per GET route (default: 20)')
+    parser.add_argument('--threads', type=int, default=8, help='threads for the concurrent booking run (default: 8)')
+    parser.add_argument('--movies', type=int, default=200, help='synthetic movies (default: 200)')
+    parser.add_argument('--days', type=int, default=3, help='synthetic schedule horizon in days (default: 3)')
+    parser.add_argument('--bookings', type=int, default=20000, help='synthetic bookings (default: 20000)')
+    parser.add_argument('--seed', type=int, default=1234, help='random seed (default: 1234)')
+    parser.add_argument('--sqlite-wal', action='store_true', help='enable the SQLite WAL pragmas (SQLITE_WAL)')
+    parser.add_argument('--booking-writer', choices=('direct', 'queue'), default='direct',
+                        help='BOOKING_WRITER mode for the test-client app (default: direct)')
+    parser.add_argument('--no-metrics', action='store_true', help='disable the /metrics instrumentation (METRICS_ENABLED)')
+    parser.add_argument('--url', help='benchmark a running server instead of the test client')
+    parser.add_argument('--movie-ids', default='1', help='comma separated movie ids to hit with --url')
+    parser.add_argument('--showtime-ids', default='1,2,3', help='comma separated showtime ids to hit with --url (last two are booked)')
+    parser.add_argument('--output', help='write the JSON report to this file')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help='compare two JSON reports and exit')
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    report = run_benchmarks(args)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(report, fh, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    main()
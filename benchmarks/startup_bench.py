@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Cold-start benchmark: package import, app factory and first request.
+
+Each run is a fresh interpreter, the way a gunicorn worker, a ``flask`` CLI
+call or a cron job starts. The child process reports how long ``from app
+import create_app``, ``create_app()`` and the first ``GET /`` took; the
+parent adds total process wall time (interpreter startup included).
+
+Usage (from the repository root)::
+
+    python -m benchmarks.startup_bench
+    python -m benchmarks.startup_bench --runs 20 --output startup.json
+    python -m benchmarks.startup_bench --database sqlite:////path/to/tiketa.db
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.http_bench import percentile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PHASES = ('import_ms', 'factory_ms', 'first_request_ms', 'process_ms')
+
+CHILD = r'''
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app({'SQLALCHEMY_DATABASE_URI': sys.argv[1]})
+created = time.perf_counter()
+status = app.test_client().get('/').status_code
+served = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'factory_ms': (created - imported) * 1000,
+    'first_request_ms': (served - created) * 1000,
+    'status': status,
+}))
+'''
+
+
+def build_database() -> str:
+    """Create and seed a small SQLite database; return its URL."""
+    from app import create_app, seed_initial_data
+    from app.models import db
+    from app.schema import create_schema
+
+    path = os.path.join(tempfile.mkdtemp(prefix='tiketa-startup-'), 'startup.db')
+    url = f'sqlite:///{path}'
+    app = create_app({'SQLALCHEMY_DATABASE_URI': url, 'SCHEMA_CHECK': False})
+    with app.app_context():
+        create_schema()
+        db.session.commit()
+        seed_initial_data()
+    return url
+
+
+def run_once(database_url: str) -> dict:
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, '-c', CHILD, database_url],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    sample = json.loads(completed.stdout.strip().splitlines()[-1])
+    sample['process_ms'] = (time.perf_counter() - started) * 1000
+    return sample
+
+
+def summarize(samples: list[dict]) -> dict:
+    return {
+        phase: {
+            'p50': round(percentile([s[phase] for s in samples], 50), 1),
+            'p95': round(percentile([s[phase] for s in samples], 95), 1),
+        }
+        for phase in PHASES
+    }
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10, help='fresh processes to start (default: 10)')
+    parser.add_argument('--database', help='database URL to boot against (default: a seeded temp SQLite file)')
+    parser.add_argument('--output', help='write the JSON report to this file')
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    database_url = args.database or build_database()
+
+    run_once(database_url)  # warm the OS file cache
+    samples = [run_once(database_url) for _ in range(args.runs)]
+    statuses = sorted({sample['status'] for sample in samples})
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'runs': args.runs,
+            'database': database_url,
+            'statuses': statuses,
+        },
+        'results': summarize(samples),
+    }
+
+    print(f"{'phase':<20}{'p50 ms':>10}{'p95 ms':>10}")
+    for phase, result in report['results'].items():
+        print(f"{phase:<20}{result['p50']:>10}{result['p95']:>10}")
+    print(f"first request statuses: {statuses}")
+
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(report, fh, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, ROOT)
+    main()
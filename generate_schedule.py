@@ -1,16 +1,17 @@
 #!/usr/bin/env python3
-"""Utility script to maintain a rolling three-day schedule of showtimes."""
+"""Utility script to maintain a rolling schedule of showtimes (three days by default)."""
 
 from __future__ import annotations
+import argparse
+from collections import defaultdict
 from datetime import datetime, timedelta, time
-import pytz
+from sqlalchemy import select, update
 
 from app import create_app
 from app.models import db, Movie, Showtime
+from app.seeding import chunked, insert_rows
+from app.timezones import to_local_naive, to_utc_naive
 
-# --- PERUBAHAN: Jadikan semua sadar zona waktu ---
-JAKARTA_TZ = pytz.timezone('Asia/Jakarta')
-UTC = pytz.UTC
 START_HOUR = 6  # Jam 6 pagi WIB
 
 EVEN_INTERVAL_HOURS = 3
@@ -41,81 +42,103 @@ def _generate_slots(studio_number: int) -> tuple[int, int]:
     interval = EVEN_INTERVAL_HOURS if is_even else ODD_INTERVAL_HOURS
     return slots, interval
 
-def _to_local_naive(utc_dt: datetime) -> datetime:
-    """Convert a naive UTC datetime into a naive Jakarta-local datetime."""
-    utc_aware = UTC.localize(utc_dt) if utc_dt.tzinfo is None else utc_dt.astimezone(UTC)
-    return utc_aware.astimezone(JAKARTA_TZ).replace(tzinfo=None)
-
-
-def _to_utc_naive(local_dt: datetime) -> datetime:
-    """Convert a naive Jakarta-local datetime into a naive UTC datetime."""
-    local_aware = JAKARTA_TZ.localize(local_dt) if local_dt.tzinfo is None else local_dt
-    return local_aware.astimezone(UTC).replace(tzinfo=None)
+def _expected_slots_utc(target_dates: list, slots: int, interval_hours: int) -> set[datetime]:
+    """Return the naive UTC start times of one cadence across ``target_dates``."""
+    expected: set[datetime] = set()
+    for target_date in target_dates:
+        first_show_utc = to_utc_naive(datetime.combine(target_date, time(hour=START_HOUR)))
+        expected.update(
+            first_show_utc + timedelta(hours=interval_hours * slot_index)
+            for slot_index in range(slots)
+        )
+    return expected
 
 
 def generate_upcoming_showtimes(days: int = 3) -> int:
-    """Ensure each movie has scheduled showtimes for the next `days` days."""
-    now_local = datetime.now(JAKARTA_TZ).replace(tzinfo=None)
-    new_records = 0
-
-    for movie in Movie.query.order_by(Movie.studio_number):
-        slots, interval_hours = _generate_slots(movie.studio_number)
-
-        for i in range(days):
-            target_date = (now_local + timedelta(days=i)).date()
-            day_start_local = datetime.combine(target_date, time.min)
-            day_end_local = datetime.combine(target_date, time.max)
-            day_start_utc = _to_utc_naive(day_start_local)
-            day_end_utc = _to_utc_naive(day_end_local)
-
-            existing_showtimes = (
-                Showtime.query
-                .filter(
-                    Showtime.movie_id == movie.id,
-                    Showtime.time.between(day_start_utc, day_end_utc),
-                    Showtime.is_archived.is_(False)
-                )
-                .order_by(Showtime.time)
-                .all()
-            )
-
-            normalized_existing = {_to_local_naive(st.time) for st in existing_showtimes}
-
-            start_time_local = datetime.combine(target_date, time(hour=START_HOUR))
-            expected_times_local = [
-                start_time_local + timedelta(hours=interval_hours * slot_index)
-                for slot_index in range(slots)
-            ]
-            expected_normalized = {_to_local_naive(_to_utc_naive(ts)) for ts in expected_times_local}
-
-            # Archive any showtimes that don't align with the expected cadence
-            for st in existing_showtimes:
-                normalized = _to_local_naive(st.time)
-                if normalized not in expected_normalized:
-                    st.is_archived = True
-
-            for show_time_local in expected_times_local:
-                normalized_show_time = show_time_local.replace(minute=0, second=0, microsecond=0)
-                if normalized_show_time in normalized_existing:
-                    continue
-
-                show_time_utc = _to_utc_naive(show_time_local)
-                db.session.add(Showtime(movie_id=movie.id, time=show_time_utc))
-                normalized_existing.add(normalized_show_time)
-                new_records += 1
-
-    if new_records:
+    """Ensure each movie has scheduled showtimes for the next `days` days.
+
+    Works set-based: one query loads every live showtime in the horizon, the
+    expected cadence is computed once per slot pattern (not per movie), and
+    the diff is applied with bulk UPDATE/INSERT statements in one transaction.
+    Comparison happens on the stored naive UTC values, so existing rows are
+    never converted; new rows get ``local_date`` from the column default.
+    """
+    if days < 1:
+        return 0
+
+    now_local = to_local_naive(_now_utc_naive())
+    target_dates = [(now_local + timedelta(days=i)).date() for i in range(days)]
+    window_start_utc = to_utc_naive(datetime.combine(target_dates[0], time.min))
+    window_end_utc = to_utc_naive(datetime.combine(target_dates[-1], time.max))
+
+    movies = db.session.execute(select(Movie.id, Movie.studio_number)).all()
+
+    existing_by_movie: dict[int, dict[datetime, list[int]]] = defaultdict(lambda: defaultdict(list))
+    existing_rows = db.session.execute(
+        select(Showtime.id, Showtime.movie_id, Showtime.time).where(
+            Showtime.time.between(window_start_utc, window_end_utc),
+            Showtime.is_archived.is_(False)
+        )
+    )
+    for showtime_id, movie_id, show_time in existing_rows:
+        existing_by_movie[movie_id][show_time].append(showtime_id)
+
+    expected_by_cadence: dict[tuple[int, int], set[datetime]] = {}
+    to_archive: list[int] = []
+    to_insert: list[dict] = []
+
+    for movie_id, studio_number in movies:
+        cadence = _generate_slots(studio_number)
+        expected = expected_by_cadence.get(cadence)
+        if expected is None:
+            expected = expected_by_cadence[cadence] = _expected_slots_utc(target_dates, *cadence)
+
+        existing = existing_by_movie.get(movie_id, {})
+
+        # Archive any showtimes that don't align with the expected cadence
+        for show_time, showtime_ids in existing.items():
+            if show_time not in expected:
+                to_archive.extend(showtime_ids)
+
+        to_insert.extend(
+            {'movie_id': movie_id, 'time': show_time}
+            for show_time in sorted(expected)
+            if show_time not in existing
+        )
+
+    for chunk in chunked(to_archive):
+        db.session.execute(
+            update(Showtime)
+            .where(Showtime.id.in_(chunk))
+            .values(is_archived=True)
+            .execution_options(synchronize_session=False)
+        )
+
+    insert_rows(Showtime, to_insert)
+
+    if to_archive or to_insert:
         db.session.commit()
 
-    return new_records
+    return len(to_insert)
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--days",
+        type=int,
+        default=3,
+        help="number of days (starting today) to keep scheduled (default: 3)",
+    )
+    args = parser.parse_args(argv)
+    if args.days < 1:
+        parser.error("--days must be at least 1")
 
-def main() -> None:
     app = create_app()
     with app.app_context():
         purged = purge_past_showtimes() 
         print(f"Archived {purged} past showtimes.")
         
-        created = generate_upcoming_showtimes()
+        created = generate_upcoming_showtimes(args.days)
         print(f"Created {created} new upcoming showtimes.")
 
 if __name__ == "__main__":
@@ -5,7 +5,9 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from app import create_app
+from app.catalog import bump_catalog_version
 from app.models import db
+from app.schema import create_schema
 
 app = create_app()
 
@@ -13,5 +15,7 @@ with app.app_context():
     print("Menghapus semua tabel dari database...")
     db.drop_all()
     print("Membuat ulang semua tabel...")
-    db.create_all()
+    create_schema()
+    bump_catalog_version()
+    db.session.commit()
     print("Database berhasil di-reset!")
@@ -2,7 +2,6 @@ import os
 import click
 from app import create_app, seed_initial_data
 from app.models import db
-from generate_schedule import generate_upcoming_showtimes
 
 # Buat instance aplikasi dari factory
 app = create_app()
@@ -11,8 +10,13 @@ app = create_app()
 @app.cli.command("reset-db")
 def reset_db_command():
     """Drops and recreates all database tables."""
+    from app.catalog import bump_catalog_version
+    from app.schema import create_schema
     db.drop_all()
-    db.create_all()
+    create_schema()
+    # Cached catalog pages must not survive the reset
+    bump_catalog_version()
+    db.session.commit()
     print("Database berhasil di-reset.")
 
 # Perintah ini sudah ada sebelumnya, untuk mengisi data film
@@ -21,18 +25,176 @@ def seed_db_command():
     """Seeds the database with initial movies and genres."""
     seed_initial_data()
 
+@app.cli.command("init-db")
+def init_db_command():
+    """Creates the schema of a new database (or upgrades an existing one)."""
+    from app.schema import SCHEMA_VERSION, upgrade_schema
+    upgrade_schema()
+    print(f"Database siap (schema versi {SCHEMA_VERSION}).")
+
+@app.cli.command("upgrade-db")
+def upgrade_db_command():
+    """Creates missing tables, columns and indexes on an existing database."""
+    from app.schema import upgrade_schema
+    result = upgrade_schema()
+    if result['columns']:
+        print("Kolom ditambahkan: " + ", ".join(result['columns']))
+    if result['rebuilt']:
+        print("Tabel dibuat ulang dengan AUTOINCREMENT: " + ", ".join(result['rebuilt']))
+    if result['indexes']:
+        print("Index dibuat: " + ", ".join(result['indexes']))
+    if result['backfilled']:
+        print(f"{result['backfilled']} showtime diisi local_date.")
+    if result['seat_counts']:
+        print(f"{result['seat_counts']} showtime dihitung ulang seats_booked.")
+    if not any(result.values()):
+        print("Schema sudah up to date.")
+
+@app.cli.command("reconcile-seat-counts")
+def reconcile_seat_counts_command():
+    """Recounts Showtime.seats_booked from the bookings table."""
+    from app.seat_counts import reconcile_seat_counts
+    fixed = reconcile_seat_counts()
+    print(f"{fixed} showtime diperbaiki." if fixed else "Semua counter kursi sudah sesuai.")
+
+@app.cli.command("explain-queries")
+def explain_queries_command():
+    """Prints the query plans of the hot showtime and booking queries."""
+    from app.schema import explain_hot_queries
+    try:
+        plans = explain_hot_queries()
+    except ValueError as exc:
+        raise click.ClickException(str(exc))
+    for name, (sql, plan) in plans.items():
+        print(f"== {name}")
+        print(sql)
+        for line in plan:
+            print(f"   {line}")
+        print()
+
+@app.cli.command("seed-synthetic")
+@click.option("--movies", default=200, show_default=True, help="Number of movies (one studio each).")
+@click.option("--days", default=3, show_default=True, help="Days of showtimes to schedule.")
+@click.option("--bookings", default=10000, show_default=True, help="Number of random bookings.")
+@click.option("--seed", type=int, default=None, help="Random seed for a reproducible catalog.")
+@click.option("--reset", is_flag=True, help="Drop and recreate all tables first.")
+def seed_synthetic_command(movies, days, bookings, seed, reset):
+    """Generates a synthetic catalog of N movies, M days and K bookings."""
+    from time import perf_counter
+    from app.models import Movie
+    from app.schema import create_schema
+    from app.sample_data.synthetic import generate_synthetic_catalog
+
+    if reset:
+        db.drop_all()
+        create_schema()
+        db.session.commit()
+    elif Movie.query.count() != 0:
+        print("Database already contains data. Gunakan --reset untuk mengosongkan dulu.")
+        return
+
+    started = perf_counter()
+    counts = generate_synthetic_catalog(movies, days, bookings, seed=seed)
+    elapsed = perf_counter() - started
+    summary = ", ".join(f"{count} {table}" for table, count in counts.items())
+    print(f"Synthetic catalog dibuat dalam {elapsed:.2f}s: {summary}.")
+
+@app.cli.command("sweep-holds")
+def sweep_holds_command():
+    """Deletes expired seat holds in one bulk statement."""
+    from app.holds import get_hold_store
+    removed = get_hold_store().sweep()
+    print(f"{removed} seat hold kadaluarsa dihapus.")
+
+@app.cli.command("archive-showtimes")
+@click.option("--keep-days", default=1, show_default=True, help="Keep showtimes that started within this many days.")
+@click.option("--chunk-size", default=100, show_default=True, help="Showtimes moved per transaction.")
+@click.option("--pause", default=0.0, show_default=True, help="Seconds to sleep between chunks.")
+@click.option("--max-batches", type=int, default=None, help="Stop after this many chunks.")
+def archive_showtimes_command(keep_days, chunk_size, pause, max_batches):
+    """Moves past showtimes and their bookings to the archive tables."""
+    from app.archive import archive_past_showtimes
+    report = archive_past_showtimes(keep_days, chunk_size, pause, max_batches)
+    print(
+        f"{report.showtimes} showtime dan {report.bookings} booking dipindahkan ke arsip "
+        f"dalam {report.batches} batch ({report.elapsed:.2f}s)."
+    )
+
+@app.cli.command("export")
+@click.argument("kind", type=click.Choice(["bookings", "showtimes"]))
+@click.option("--format", "fmt", type=click.Choice(["csv", "ndjson"]), default="csv", show_default=True)
+@click.option("--from", "date_from", type=click.DateTime(["%Y-%m-%d"]), help="First local show date (inclusive).")
+@click.option("--to", "date_to", type=click.DateTime(["%Y-%m-%d"]), help="Last local show date (inclusive).")
+@click.option("--movie-id", type=int, help="Only this movie.")
+@click.option("--archived", is_flag=True, help="Read the archive tables instead of the live ones.")
+@click.option("--output", "-o", type=click.Path(dir_okay=False), help="Write to this file instead of stdout.")
+def export_command(kind, fmt, date_from, date_to, movie_id, archived, output):
+    """Streams bookings or showtimes as CSV or NDJSON with flat memory use."""
+    import sys
+    import time
+    from app.exports import export_query, stream_export
+    statement = export_query(
+        kind,
+        date_from.date() if date_from else None,
+        date_to.date() if date_to else None,
+        movie_id,
+        archived,
+    )
+    started = time.perf_counter()
+    fh = open(output, "w", encoding="utf-8", newline="") if output else sys.stdout
+    try:
+        for chunk in stream_export(statement, fmt):
+            fh.write(chunk)
+    finally:
+        if output:
+            fh.close()
+    if output:
+        print(f"Export {kind} selesai: {output} ({time.perf_counter() - started:.2f}s).", file=sys.stderr)
+
+@app.cli.command("import-bookings")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--rejects", type=click.Path(dir_okay=False), help="Where rejected rows go (default: <path>.rejects.csv).")
+@click.option("--batch-size", default=5000, show_default=True, help="Rows inserted per transaction.")
+def import_bookings_command(path, rejects, batch_size):
+    """Imports box-office sales (showtime_id,seat,user CSV), skipping seats already sold."""
+    from app.imports import import_bookings
+    rejects = rejects or f"{os.path.splitext(path)[0]}.rejects.csv"
+    with open(path, encoding="utf-8", newline="") as source, open(rejects, "w", encoding="utf-8", newline="") as rejected:
+        try:
+            report = import_bookings(source, rejected, batch_size)
+        except ValueError as exc:
+            raise click.ClickException(str(exc))
+    print(
+        f"{report.inserted} dari {report.rows} booking diimpor dalam {report.batches} batch "
+        f"({report.elapsed:.2f}s, {report.rows_per_second:,.0f} baris/detik)."
+    )
+    if report.rejected:
+        print(f"{report.rejected} baris ditolak, lihat {rejects}.")
+
+@app.cli.command("build-assets")
+def build_assets_command():
+    """Minifies, fingerprints and precompresses the stylesheets into app/static/dist."""
+    from app.assets import build_assets
+    for name, entry in build_assets().items():
+        sizes = ", ".join(f"{kind} {size:,} B" for kind, size in entry['sizes'].items())
+        print(f"{name} -> {entry['file']} (sumber {entry['bytes']:,} B; {sizes})")
+    print("Restart aplikasi agar manifest baru dipakai.")
+
 # --- PERINTAH BARU YANG MENGGABUNGKAN SEMUANYA ---
 @app.cli.command("full-reset")
 def full_reset_command():
     """Drops all tables, recreates them, seeds movies, and generates a 3-day schedule."""
     if click.confirm("PERINGATAN: Ini akan menghapus SEMUA data. Lanjutkan?"):
+        from app.schema import create_schema
         print("-> Menghapus semua tabel...")
         db.drop_all()
         print("-> Membuat ulang semua tabel...")
-        db.create_all()
+        create_schema()
+        db.session.commit()
         print("-> Mengisi data film & genre awal...")
         seed_initial_data()
         print("-> Membuat jadwal baru untuk 3 hari ke depan...")
+        from generate_schedule import generate_upcoming_showtimes
         # Panggil fungsi dari skrip yang sudah benar
         generate_upcoming_showtimes() 
         print("\n✅ Reset total dan seeding berhasil diselesaikan.")